@@ -0,0 +1,300 @@
+"""Storage for users' saved ads.
+
+Two backends share one async interface:
+
+* ``MemoryAdsStore`` – per-process dicts, for the demo and tests.
+* ``SqliteAdsStore`` – an embedded SQLite file that several uvicorn workers
+  can share; ids come from the database, not from a process counter.
+
+Ads are addressed by ``(user_id, ad_id)`` in O(1) (memory) or O(log n)
+(SQLite primary key). Listings are ordered by ``(created_at, id)`` and
+paginated with an opaque cursor that encodes the last key returned.
+
+Each store also keeps a per-user version that every write bumps, next to
+the ads themselves, so ETags computed from it agree with the data in every
+process that reads the same store.
+"""
+
+import os
+import json
+import base64
+import bisect
+import asyncio
+import sqlite3
+import uuid
+import threading
+from datetime import datetime
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+ADS_STORE = os.getenv("ADS_STORE", "memory")
+ADS_DB_PATH = os.getenv("ADS_DB_PATH", "saved_ads.db")
+
+# fixed width, so ISO strings sort like the datetimes they encode
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, ad_id: int) -> str:
+    raw = f"{created_at.strftime(_TS_FORMAT)}|{ad_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, ad_id = raw.split("|")
+        datetime.strptime(ts, _TS_FORMAT)
+        return ts, int(ad_id)
+    except ValueError as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+class AdsStore:
+    """Interface; every method is scoped to one user."""
+
+    async def create(self, user_id: str, fields: dict) -> dict:
+        raise NotImplementedError
+
+    async def get(self, user_id: str, ad_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def update(self, user_id: str, ad_id: int, fields: dict) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def delete(self, user_id: str, ad_id: int) -> bool:
+        raise NotImplementedError
+
+    async def list(
+        self, user_id: str, limit: int = 50, cursor: Optional[str] = None, descending: bool = True
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Up to ``limit`` ads after ``cursor``, plus the cursor of the next page (or None)."""
+        raise NotImplementedError
+
+    async def version(self, user_id: str) -> str:
+        """Opaque tag that changes whenever one of the user's ads is created, updated or deleted."""
+        raise NotImplementedError
+
+
+class MemoryAdsStore(AdsStore):
+    """Per-user dict index plus a sorted key list for ordered pages.
+
+    Deleted keys stay in the sorted list as tombstones and are compacted
+    once they make up half of it, so deletes stay amortized O(1).
+    """
+
+    def __init__(self):
+        self._ads: Dict[str, Dict[int, dict]] = {}
+        self._order: Dict[str, List[Tuple[str, int]]] = {}
+        self._ids = count(1)
+        self._versions: Dict[str, int] = {}
+        # the data dies with the process, so a new instance must never repeat a tag
+        self._epoch = uuid.uuid4().hex[:12]
+
+    def _touch(self, user_id: str) -> None:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    async def create(self, user_id: str, fields: dict) -> dict:
+        ad = {**fields, "id": next(self._ids), "user_id": user_id, "created_at": datetime.utcnow()}
+        self._ads.setdefault(user_id, {})[ad["id"]] = ad
+        bisect.insort(self._order.setdefault(user_id, []), (ad["created_at"].strftime(_TS_FORMAT), ad["id"]))
+        self._touch(user_id)
+        return dict(ad)
+
+    async def get(self, user_id: str, ad_id: int) -> Optional[dict]:
+        ad = self._ads.get(user_id, {}).get(ad_id)
+        return dict(ad) if ad else None
+
+    async def update(self, user_id: str, ad_id: int, fields: dict) -> Optional[dict]:
+        ad = self._ads.get(user_id, {}).get(ad_id)
+        if ad is None:
+            return None
+        ad.update(fields)
+        self._touch(user_id)
+        return dict(ad)
+
+    async def delete(self, user_id: str, ad_id: int) -> bool:
+        ads = self._ads.get(user_id, {})
+        if ads.pop(ad_id, None) is None:
+            return False
+        self._touch(user_id)
+        order = self._order[user_id]
+        if len(order) > 2 * len(ads):
+            self._order[user_id] = [key for key in order if key[1] in ads]
+        return True
+
+    async def list(self, user_id, limit=50, cursor=None, descending=True):
+        ads = self._ads.get(user_id, {})
+        order = self._order.get(user_id, [])
+        if descending:
+            pos = bisect.bisect_left(order, decode_cursor(cursor)) - 1 if cursor else len(order) - 1
+            step = -1
+        else:
+            pos = bisect.bisect_right(order, decode_cursor(cursor)) if cursor else 0
+            step = 1
+        page = []
+        while 0 <= pos < len(order) and len(page) <= limit:
+            ad = ads.get(order[pos][1])
+            if ad is not None:
+                page.append(dict(ad))
+            pos += step
+        return _split_page(page, limit)
+
+    async def version(self, user_id):
+        return f"{self._epoch}-{self._versions.get(user_id, 0)}"
+
+
+def _split_page(rows: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """``rows`` holds up to ``limit + 1`` items; the extra one only proves a next page exists."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+
+class SqliteAdsStore(AdsStore):
+    """Ads in one SQLite table with an index on ``(user_id, created_at, id)``.
+
+    Versions live in ``saved_ads_versions`` and are bumped in the same
+    transaction as the write they record.
+    """
+
+    def __init__(self, path: str = ADS_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS saved_ads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS saved_ads_user_created
+                    ON saved_ads (user_id, created_at, id);
+                CREATE TABLE IF NOT EXISTS saved_ads_versions (
+                    user_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS saved_ads_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                """
+            )
+            # a recreated database file restarts the counters, so tags also carry its epoch
+            conn.execute("INSERT OR IGNORE INTO saved_ads_meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:12],))
+            self._epoch = conn.execute("SELECT value FROM saved_ads_meta WHERE key = 'epoch'").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must stay on the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row) -> dict:
+        ad_id, user_id, created_at, data = row
+        return {
+            **json.loads(data),
+            "id": ad_id,
+            "user_id": user_id,
+            "created_at": datetime.strptime(created_at, _TS_FORMAT),
+        }
+
+    @staticmethod
+    def _touch(conn: sqlite3.Connection, user_id: str) -> None:
+        conn.execute(
+            "INSERT INTO saved_ads_versions (user_id, version) VALUES (?, 1)"
+            " ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+            (user_id,),
+        )
+
+    def _create(self, user_id: str, fields: dict) -> dict:
+        created_at = datetime.utcnow()
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT INTO saved_ads (user_id, created_at, data) VALUES (?, ?, ?)",
+                (user_id, created_at.strftime(_TS_FORMAT), json.dumps(fields, default=str)),
+            )
+            self._touch(conn, user_id)
+        return {**fields, "id": cur.lastrowid, "user_id": user_id, "created_at": created_at}
+
+    def _get(self, user_id: str, ad_id: int) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT id, user_id, created_at, data FROM saved_ads WHERE id = ? AND user_id = ?",
+            (ad_id, user_id),
+        ).fetchone()
+        return self._row(row) if row else None
+
+    def _update(self, user_id: str, ad_id: int, fields: dict) -> Optional[dict]:
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT id, user_id, created_at, data FROM saved_ads WHERE id = ? AND user_id = ?",
+                (ad_id, user_id),
+            ).fetchone()
+            if row is None:
+                return None
+            ad = self._row(row)
+            data = {**json.loads(row[3]), **fields}
+            conn.execute("UPDATE saved_ads SET data = ? WHERE id = ?", (json.dumps(data, default=str), ad_id))
+            self._touch(conn, user_id)
+        ad.update(fields)
+        return ad
+
+    def _delete(self, user_id: str, ad_id: int) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute("DELETE FROM saved_ads WHERE id = ? AND user_id = ?", (ad_id, user_id))
+            if cur.rowcount:
+                self._touch(conn, user_id)
+        return cur.rowcount > 0
+
+    def _list(self, user_id, limit, cursor, descending):
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        sql = "SELECT id, user_id, created_at, data FROM saved_ads WHERE user_id = ?"
+        params: list = [user_id]
+        if cursor:
+            sql += f" AND (created_at, id) {op} (?, ?)"
+            params += list(decode_cursor(cursor))
+        sql += f" ORDER BY created_at {direction}, id {direction} LIMIT ?"
+        params.append(limit + 1)
+        rows = self._conn().execute(sql, params).fetchall()
+        return _split_page([self._row(r) for r in rows], limit)
+
+    def _version(self, user_id: str) -> str:
+        row = self._conn().execute("SELECT version FROM saved_ads_versions WHERE user_id = ?", (user_id,)).fetchone()
+        return f"{self._epoch}-{row[0] if row else 0}"
+
+    async def create(self, user_id, fields):
+        return await asyncio.to_thread(self._create, user_id, fields)
+
+    async def get(self, user_id, ad_id):
+        return await asyncio.to_thread(self._get, user_id, ad_id)
+
+    async def update(self, user_id, ad_id, fields):
+        return await asyncio.to_thread(self._update, user_id, ad_id, fields)
+
+    async def delete(self, user_id, ad_id):
+        return await asyncio.to_thread(self._delete, user_id, ad_id)
+
+    async def list(self, user_id, limit=50, cursor=None, descending=True):
+        return await asyncio.to_thread(self._list, user_id, limit, cursor, descending)
+
+    async def version(self, user_id):
+        return await asyncio.to_thread(self._version, user_id)
+
+
+def create_store(kind: str = ADS_STORE) -> AdsStore:
+    if kind == "memory":
+        return MemoryAdsStore()
+    if kind == "sqlite":
+        return SqliteAdsStore()
+    raise ValueError(f"Unknown ADS_STORE {kind!r}; expected 'memory' or 'sqlite'")
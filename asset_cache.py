@@ -0,0 +1,200 @@
+"""Worker-local, content-addressed on-disk cache for remote render assets."""
+
+import os
+import json
+import time
+import asyncio
+import fcntl
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR", os.path.join(tempfile.gettempdir(), "clipopera_asset_cache"))
+ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Entries younger than this are served without revalidating against the origin
+ASSET_CACHE_TTL = float(os.getenv("ASSET_CACHE_TTL", "300"))
+
+
+class DiskCache:
+    """Directory of content-addressed blobs with a size cap and LRU eviction.
+
+    Several worker processes on one host may share a root: writes land via
+    atomic renames and eviction runs under an exclusive ``flock``. Recency is
+    tracked through blob mtimes, which are bumped on every hit.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.blob_dir = os.path.join(root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, ".lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _atomic_write(self, path: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def blob_path(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest + suffix)
+
+    def put_bytes(self, data: bytes, suffix: str = "") -> str:
+        """Store ``data`` and return its content digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest, suffix)
+        if os.path.exists(path):
+            self.touch(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._atomic_write(path, data)
+            self.evict()
+        return digest
+
+    def touch(self, path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Drop least recently used blobs until the cache fits ``max_bytes``."""
+        removed = 0
+        with self._locked():
+            entries = []
+            total = 0
+            for dirpath, _, filenames in os.walk(self.blob_dir):
+                for name in filenames:
+                    if name.startswith(".tmp-"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return 0
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        self.evictions += removed
+        if removed:
+            logger.info(f"[{type(self).__name__}] Evicted {removed} blobs from {self.root}")
+        return removed
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class AssetCache(DiskCache):
+    """URL -> content cache validated with ETag / Last-Modified."""
+
+    def __init__(self, root: str = ASSET_CACHE_DIR, max_bytes: int = ASSET_CACHE_MAX_BYTES, ttl: float = ASSET_CACHE_TTL):
+        super().__init__(root, max_bytes)
+        self.ttl = ttl
+        self.index_dir = os.path.join(root, "index")
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.revalidations = 0
+
+    def _index_path(self, url: str) -> str:
+        return os.path.join(self.index_dir, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def _read_entry(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._index_path(url)) as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self.blob_path(entry["digest"], entry.get("suffix", ""))):
+            return None
+        return entry
+
+    def _write_entry(self, url: str, entry: dict) -> None:
+        self._atomic_write(self._index_path(url), json.dumps(entry).encode())
+
+    def _store(self, url: str, resp: httpx.Response, suffix: str) -> str:
+        digest = self.put_bytes(resp.content, suffix)
+        self._write_entry(url, {
+            "url": url,
+            "digest": digest,
+            "suffix": suffix,
+            "etag": resp.headers.get("etag"),
+            "last_modified": resp.headers.get("last-modified"),
+            "fetched_at": time.time(),
+        })
+        return self.blob_path(digest, suffix)
+
+    async def fetch(
+        self,
+        url: str,
+        get: Callable[..., Awaitable[httpx.Response]],
+        suffix: str = "",
+    ) -> str:
+        """Return a local path holding the content of ``url``.
+
+        ``get(url, headers=...)`` performs the request and must return 304
+        responses instead of raising on them.
+        """
+        entry = self._read_entry(url)
+        if entry:
+            path = self.blob_path(entry["digest"], entry.get("suffix", ""))
+            if time.time() - entry["fetched_at"] < self.ttl:
+                self.hits += 1
+                self.touch(path)
+                return path
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            if headers:
+                resp = await get(url, headers=headers)
+                self.revalidations += 1
+                if resp.status_code == 304:
+                    self.hits += 1
+                    entry["fetched_at"] = time.time()
+                    self._write_entry(url, entry)
+                    self.touch(path)
+                    return path
+                self.misses += 1
+                return await asyncio.to_thread(self._store, url, resp, suffix)
+        self.misses += 1
+        resp = await get(url)
+        # writing and evicting take the cache flock and walk the blob dir
+        return await asyncio.to_thread(self._store, url, resp, suffix)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "revalidations": self.revalidations}
@@ -1,38 +1,45 @@
 import os
+import base64
 import logging
 import asyncio
+import time
 import uuid
+import shutil
+import hashlib
+from datetime import datetime
 from tempfile import NamedTemporaryFile
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 
 import httpx
 from celery import Celery
-from tenacity import retry, stop_after_attempt, wait_fixed
-from moviepy.editor import (
-    ImageClip,
-    ColorClip,
-    TextClip,
-    CompositeVideoClip,
-    concatenate_videoclips,
-    concatenate_audioclips,
-    AudioFileClip,
-    VideoFileClip,  # for 3D model intro clips
-    vfx,
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    task_revoked,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
 )
-from gtts import gTTS
-import boto3
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.adimage import AdImage
-from facebook_business.adobjects.advideo import AdVideo
-from facebook_business.adobjects.adaccount import AdAccount
-from facebook_business.adobjects.campaign import Campaign
-from facebook_business.adobjects.adset import AdSet
-from facebook_business.adobjects.adcreative import AdCreative
-from facebook_business.adobjects.ad import Ad
+from tenacity import retry, stop_after_attempt, wait_fixed
 
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+import ffmpeg_render
+import parallel_render
+import providers
+import http_pool
+import meta_batch
+import metrics
+import render_cache
+import s3_stream
+import segment_store
+import task_progress
+import text_raster
+from asset_cache import AssetCache
+from render_plan import PlannedScene, RenderPlan
+from tts import TTSCache
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +51,22 @@ AWS_REGION = os.getenv("AWS_REGION")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 
 BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+# Maximum number of scene asset downloads / TTS syntheses run at once
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "8"))
+# Distinct assets of a bulk Meta publish uploaded at once
+META_UPLOAD_CONCURRENCY = int(os.getenv("META_UPLOAD_CONCURRENCY", "4"))
+# Frame sizes whose template outro text is rasterized at worker start
+TEXT_WARM_SIZES = [
+    tuple(int(v) for v in size.split("x"))
+    for size in os.getenv("TEXT_WARM_SIZES", "720x1280,1080x1920").split(",")
+    if size
+]
+# Splice cached, pre-encoded outro/padding segments instead of re-encoding them
+PREENCODED_SEGMENTS = os.getenv("PREENCODED_SEGMENTS", "1") == "1"
+# Upload fragmented MP4 parts to S3 while the encoder is still running
+STREAM_UPLOAD = os.getenv("STREAM_UPLOAD", "0") == "1"
+# Forces a render engine ("moviepy" or "ffmpeg") regardless of template
+RENDER_ENGINE = os.getenv("RENDER_ENGINE")
 
 if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, S3_BUCKET_NAME]):
     raise ValueError("AWS credentials or S3 bucket not configured for Celery worker")
@@ -51,17 +74,12 @@ if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, S3_BUCKET_NAME
 
 celery_app = Celery("tasks", broker=BROKER_URL, backend=BROKER_URL)
 
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION,
-)
 
-retry_config = dict(stop=stop_after_attempt(3), wait=wait_fixed(2))
+retry_config = dict(stop=stop_after_attempt(3), wait=wait_fixed(2), before_sleep=metrics.record_retry)
 
 # Mapping of video template IDs to settings like target duration and
 # optional placeholder video URLs used for the demo anime templates.
+# "render_engine" picks ffmpeg_render over the default moviepy compositor.
 VIDEO_TEMPLATE_CONFIGS = {
     "standard": {
         "video_duration": 30,
@@ -69,6 +87,7 @@ VIDEO_TEMPLATE_CONFIGS = {
         "outro_duration": 2,
         "final_outro_text": "Learn More at Our Website!",
         "text_fontsize": 48,
+        "render_engine": "ffmpeg",
     },
     "fast_paced": {
         "video_duration": 15,
@@ -90,6 +109,7 @@ VIDEO_TEMPLATE_CONFIGS = {
         "outro_duration": 2,
         "final_outro_text": "Find out more on our site",
         "text_fontsize": 45,
+        "render_engine": "ffmpeg",
     },
     "anime_10s": {
         "video_duration": 10,
@@ -149,22 +169,27 @@ VIDEO_TEMPLATE_CONFIGS = {
     },
 }
 
+asset_cache = AssetCache()
+tts_cache = TTSCache()
+
 @retry(**retry_config)
-async def safe_get(url: str) -> httpx.Response:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url)
+async def safe_get(url: str, headers: Optional[dict] = None) -> httpx.Response:
+    resp = await http_pool.get_client().get(url, headers=headers)
+    if resp.status_code != 304:
         resp.raise_for_status()
-        return resp
+    return resp
 
 @retry(**retry_config)
 async def safe_s3_upload(fileobj, key: str, content_type: str):
-    await asyncio.to_thread(
-        s3_client.upload_fileobj,
-        fileobj,
-        S3_BUCKET_NAME,
-        key,
-        ExtraArgs={"ContentType": content_type, "ACL": "public-read"},
-    )
+    s3 = await providers.aget("s3")
+    with metrics.upstream("s3", "upload_fileobj"):
+        await asyncio.to_thread(
+            s3.upload_fileobj,
+            fileobj,
+            S3_BUCKET_NAME,
+            key,
+            ExtraArgs={"ContentType": content_type, "ACL": "public-read"},
+        )
 
 
 class VideoScene(BaseModel):
@@ -172,6 +197,7 @@ class VideoScene(BaseModel):
     text: Optional[str] = None
     duration: float = Field(..., gt=0)
     tts_text: Optional[str] = None
+    tts_lang: str = "en"
 
 class VideoInput(BaseModel):
     scenes: List[VideoScene]
@@ -180,6 +206,7 @@ class VideoInput(BaseModel):
     fps: int = 30
     template_id: str = "standard"
     model_url: Optional[str] = None
+    no_cache: bool = False
 
 class MetaAdInput(BaseModel):
     user_id: str
@@ -198,8 +225,7 @@ class MetaAdInput(BaseModel):
     daily_budget: int = 1000
     objective: str = "LINK_CLICKS"
 
-class CampaignConfigInput(BaseModel):
-    user_id: str
+class MetaPublishItem(BaseModel):
     ad_account_id: str
     page_id: str
     headline: str
@@ -216,6 +242,14 @@ class CampaignConfigInput(BaseModel):
     campaign_name: Optional[str] = None
     adset_id: Optional[str] = None
     adset_name: Optional[str] = None
+
+class CampaignConfigInput(MetaPublishItem):
+    user_id: str
+    access_token: Optional[str] = None
+
+class BulkPublishInput(BaseModel):
+    user_id: str
+    items: List[MetaPublishItem]
     access_token: Optional[str] = None
 
 
@@ -233,6 +267,244 @@ async def request_3d_model_render(model_url: str, animation_type: str = "turntab
     return mock_render_url
 
 
+class PrefetchedAssets(BaseModel):
+    intro_path: Optional[str] = None
+    image_paths: List[Optional[str]]
+    audio_paths: List[Optional[str]]
+    audio_durations: List[Optional[float]]
+    elapsed: float = 0.0
+
+
+def _link_to_temp(path: str, suffix: str, temp_files: List[str]) -> str:
+    """Give the render a private name for a cached file."""
+    tmp = NamedTemporaryFile(delete=False, suffix=suffix)
+    tmp.close()
+    os.unlink(tmp.name)
+    # hard link so a concurrent eviction cannot pull the file from under moviepy
+    try:
+        os.link(path, tmp.name)
+    except OSError:
+        shutil.copyfile(path, tmp.name)
+    temp_files.append(tmp.name)
+    return tmp.name
+
+
+async def _link_cached(load: Callable[[], Awaitable[tuple]], temp_files: List[str]) -> tuple:
+    """``load()`` returns ``(cached_path, *extra)``; give the render its own link to the path.
+
+    Another process may evict the blob between ``load`` and the link, so
+    ``load`` is retried once when the file is gone.
+    """
+    for attempt in (1, 2):
+        cached, *extra = await load()
+        try:
+            return (_link_to_temp(cached, os.path.splitext(cached)[1], temp_files), *extra)
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+            logger.info(f"Cached file {cached} was evicted before use; loading it again")
+
+
+async def _download_to_temp(url: str, suffix: str, temp_files: List[str]) -> str:
+    """Fetch ``url`` through the asset cache into a render-private temp path."""
+
+    async def load() -> tuple:
+        with metrics.stage("download"):
+            return (await asset_cache.fetch(url, safe_get, suffix),)
+
+    path, = await _link_cached(load, temp_files)
+    return path
+
+
+async def _synthesize_tts(text: str, lang: str, temp_files: List[str]) -> tuple:
+    async def load() -> tuple:
+        with metrics.stage("tts"):
+            return await asyncio.to_thread(tts_cache.synthesize, text, lang)
+
+    return await _link_cached(load, temp_files)
+
+
+async def _fetch_model_intro(model_url: str, temp_files: List[str]) -> Optional[str]:
+    try:
+        rendered_url = await request_3d_model_render(model_url)
+        return await _download_to_temp(rendered_url, ".mp4", temp_files)
+    except Exception as e:
+        logger.error(f"[3D Render Integration Error] {e}")
+        return None
+
+
+async def prefetch_scene_assets(data: VideoInput, cfg: dict, temp_files: List[str]) -> PrefetchedAssets:
+    """Resolve scene images, TTS audio and the 3D intro concurrently."""
+    sem = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+    async def bounded(coro):
+        async with sem:
+            return await coro
+
+    async def nothing():
+        return None
+
+    async def counted(coro, step):
+        result = await coro
+        step()
+        return result
+
+    start = time.perf_counter()
+    task_progress.report("fetching_assets")
+    n_images = sum(1 for scene in data.scenes if scene.image_url)
+    n_audio = sum(1 for scene in data.scenes if scene.tts_text)
+    fetched = task_progress.counter("fetching_assets", n_images)
+    spoken = task_progress.counter("tts", n_audio)
+    intro = nothing()
+    if getattr(data, "model_url", None) and cfg.get("model_intro_duration", 0) > 0:
+        intro = bounded(_fetch_model_intro(data.model_url, temp_files))
+    images = [
+        counted(bounded(_download_to_temp(scene.image_url, ".png", temp_files)), fetched) if scene.image_url else nothing()
+        for scene in data.scenes
+    ]
+    audio = [
+        counted(bounded(_synthesize_tts(scene.tts_text, scene.tts_lang, temp_files)), spoken) if scene.tts_text else nothing()
+        for scene in data.scenes
+    ]
+    results = await asyncio.gather(intro, *images, *audio)
+    n = len(data.scenes)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Prefetched assets for {n} scenes in {elapsed:.2f}s (concurrency={PREFETCH_CONCURRENCY})")
+    logger.info(f"Asset cache stats: {asset_cache.stats()}, TTS cache stats: {tts_cache.stats()}")
+    narration = [r or (None, None) for r in results[1 + n:]]
+    return PrefetchedAssets(
+        intro_path=results[0],
+        image_paths=list(results[1:1 + n]),
+        audio_paths=[path for path, _ in narration],
+        audio_durations=[duration for _, duration in narration],
+        elapsed=elapsed,
+    )
+
+
+def build_render_plan(data: VideoInput, cfg: dict, assets: PrefetchedAssets) -> RenderPlan:
+    scenes = [
+        PlannedScene(
+            duration=scene.duration,
+            image_path=image_path,
+            text=scene.text,
+            audio_path=audio_path,
+            audio_duration=audio_duration,
+        )
+        for scene, image_path, audio_path, audio_duration in zip(
+            data.scenes, assets.image_paths, assets.audio_paths, assets.audio_durations
+        )
+    ]
+    return RenderPlan(
+        width=data.width,
+        height=data.height,
+        fps=data.fps,
+        scenes=scenes,
+        intro_path=assets.intro_path,
+        intro_duration=cfg.get("model_intro_duration", 0),
+        outro_text=cfg.get("final_outro_text", "Visit our website!"),
+        outro_fontsize=cfg.get("text_fontsize", 48),
+        outro_duration=cfg.get("outro_duration", 2),
+        total_duration=cfg.get("video_duration"),
+    )
+
+
+def _compositing(percent: float) -> None:
+    task_progress.report("compositing", percent)
+
+
+async def _render_timeline(plan: RenderPlan, engine: str, out_path: str, fallback: bool = True, staged: bool = True) -> str:
+    task_progress.report("compositing", 0)
+    start = time.perf_counter()
+    used = await _render_with(plan, engine, out_path, fallback, staged)
+    frames = ffmpeg_render.output_duration(plan) * plan.fps
+    metrics.ENCODE_FPS.labels(used.split()[0]).observe(frames / (time.perf_counter() - start))
+    return used
+
+
+async def _render_with(plan: RenderPlan, engine: str, out_path: str, fallback: bool, staged: bool) -> str:
+    if engine == "ffmpeg":
+        try:
+            await ffmpeg_render.render(plan, out_path, progress=_compositing)
+            return "ffmpeg"
+        except (ffmpeg_render.FFmpegRenderError, OSError) as e:
+            if not fallback:
+                raise
+            logger.warning(f"ffmpeg render engine failed, falling back to moviepy: {e}")
+    # segments are encoded to local files before they are joined
+    parts = parallel_render.split_for_pool(plan) if staged else [plan]
+    if len(parts) > 1:
+        try:
+            await parallel_render.render_segments(plan, parts, out_path, progress=_compositing)
+            return f"moviepy x{len(parts)} segments"
+        except (ffmpeg_render.FFmpegRenderError, OSError) as e:
+            if not fallback:
+                raise
+            logger.warning(f"Segment-parallel render failed, rendering in one process: {e}")
+    moviepy_engine = await providers.aget("moviepy_render")
+    await asyncio.to_thread(moviepy_engine.render, plan, out_path, _compositing)
+    return "moviepy"
+
+
+async def render_video(plan: RenderPlan, engine: str, out_path: str, fallback: bool = True, staged: bool = True) -> str:
+    """Render with ``engine``, falling back to moviepy. Returns the engine used.
+
+    With ``fallback=False`` nothing is retried against ``out_path``, which
+    matters when it is a pipe that a failed attempt may already have written to.
+    ``staged=False`` encodes the whole timeline in one pass straight into
+    ``out_path``, skipping the pre-encoded outro splice and segment-parallel
+    rendering, which both write the video to local files first.
+    """
+    if staged and PREENCODED_SEGMENTS and segment_store.can_splice(plan):
+        body_file = NamedTemporaryFile(delete=False, suffix=".mp4")
+        body_file.close()
+        try:
+            tail = await segment_store.tail_segments(plan)
+            used = await _render_timeline(segment_store.body_plan(plan), engine, body_file.name)
+            task_progress.report("encoding")
+            with metrics.stage("splice"):
+                await segment_store.splice(plan, body_file.name, tail, out_path)
+            return f"{used} + pre-encoded outro"
+        except (ffmpeg_render.FFmpegRenderError, OSError) as e:
+            if not fallback:
+                raise
+            logger.warning(f"Pre-encoded outro splice failed, rendering full timeline: {e}")
+        finally:
+            os.unlink(body_file.name)
+    return await _render_timeline(plan, engine, out_path, fallback, staged)
+
+
+async def render_and_upload(plan: RenderPlan, engine: str, key: str, temp_files: List[str]) -> str:
+    """Render ``plan`` to S3 ``key``; returns the engine used."""
+    if STREAM_UPLOAD:
+        used = []
+
+        async def produce(path: str) -> None:
+            fragmented = plan.model_copy(update={"fragmented": True})
+            used.append(await render_video(fragmented, engine, path, fallback=False, staged=False))
+            # the last parts are still on their way to S3
+            task_progress.report("uploading")
+
+        try:
+            with metrics.stage("render_and_upload_streamed"):
+                await s3_stream.stream_to_s3(produce, await providers.aget("s3"), S3_BUCKET_NAME, key, "video/mp4")
+            return f"{used[0]} (streamed)"
+        except Exception as e:
+            logger.warning(f"Streaming upload failed, rendering to a local file instead: {e}")
+    out_file = NamedTemporaryFile(delete=False, suffix=".mp4")
+    out_file.close()
+    temp_files.append(out_file.name)
+    used = await render_video(plan, engine, out_file.name)
+    task_progress.report("uploading")
+    with metrics.stage("upload"), open(out_file.name, "rb") as f:
+        await safe_s3_upload(f, key, "video/mp4")
+    return used
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
 async def generate_video_async(data: VideoInput) -> str:
     cfg = VIDEO_TEMPLATE_CONFIGS.get(data.template_id, {})
     placeholder = cfg.get("placeholder_url")
@@ -240,80 +512,29 @@ async def generate_video_async(data: VideoInput) -> str:
         logger.info(f"[{data.template_id}] Using template-specific placeholder video: {placeholder}")
         return placeholder
 
-    clips = []
-    audio_clips = []
     temp_files = []
-
-    if getattr(data, "model_url", None) and cfg.get("model_intro_duration", 0) > 0:
-        try:
-            rendered_url = await request_3d_model_render(data.model_url)
-            model_video_resp = await safe_get(rendered_url)
-            tmp_model_video = NamedTemporaryFile(delete=False, suffix=".mp4")
-            temp_files.append(tmp_model_video.name)
-            with open(tmp_model_video.name, "wb") as f:
-                f.write(model_video_resp.content)
-            model_clip = VideoFileClip(tmp_model_video.name).resize((data.width, data.height))
-            model_clip = model_clip.set_duration(cfg.get("model_intro_duration"))
-            clips.append(model_clip)
-            logger.info("3D model video successfully integrated into final ad.")
-        except Exception as e:
-            logger.error(f"[3D Render Integration Error] {e}")
-    for scene in data.scenes:
-        if scene.image_url:
-            img_resp = await safe_get(scene.image_url)
-            tmp_img = NamedTemporaryFile(delete=False, suffix=".png")
-            temp_files.append(tmp_img.name)
-            tmp_img.write(img_resp.content)
-            tmp_img.flush()
-            base = ImageClip(tmp_img.name).set_duration(scene.duration).resize((data.width, data.height))
-        else:
-            base = ColorClip(size=(data.width, data.height), color=(0,0,0)).set_duration(scene.duration)
-        overlays = [base]
-        if scene.text:
-            txt_clip = TextClip(scene.text, fontsize=48, color="white").set_position("center").set_duration(scene.duration)
-            overlays.append(txt_clip)
-        comp = CompositeVideoClip(overlays)
-        if scene.tts_text:
-            tts = gTTS(scene.tts_text)
-            tmp_audio = NamedTemporaryFile(delete=False, suffix=".mp3")
-            temp_files.append(tmp_audio.name)
-            tts.save(tmp_audio.name)
-            audio = AudioFileClip(tmp_audio.name).set_duration(scene.duration)
-            comp = comp.set_audio(audio)
-            audio_clips.append(audio)
-        clips.append(comp)
-
-    outro_duration = cfg.get("outro_duration", 2)
-    outro_clip = ColorClip(size=(data.width, data.height), color=(0,0,0)).set_duration(outro_duration)
-    outro_text_clip = TextClip(cfg.get("final_outro_text", "Visit our website!"), fontsize=cfg.get("text_fontsize", 48), color="white").set_position("center").set_duration(outro_duration)
-    final_outro = CompositeVideoClip([outro_clip, outro_text_clip])
-    clips.append(final_outro)
-    final_video = concatenate_videoclips(clips, method="compose")
-    fixed_total_duration = cfg.get("video_duration")
-    if fixed_total_duration:
-        if final_video.duration > fixed_total_duration:
-            final_video = final_video.subclip(0, fixed_total_duration)
-            logger.info(f"Video trimmed to {fixed_total_duration}s.")
-        elif final_video.duration < fixed_total_duration:
-            pad = ColorClip(size=(data.width, data.height), color=(0,0,0), duration=fixed_total_duration - final_video.duration)
-            final_video = concatenate_videoclips([final_video, pad], method="compose")
-            logger.info(f"Video extended to {fixed_total_duration}s with filler.")
-    if audio_clips:
-        final_audio = concatenate_audioclips(audio_clips)
-        if fixed_total_duration:
-            if final_audio.duration > final_video.duration:
-                final_audio = final_audio.subclip(0, final_video.duration)
-            elif final_audio.duration < final_video.duration:
-                final_audio = final_audio.fx(vfx.loop, duration=final_video.duration)
-        final_video = final_video.set_audio(final_audio)
-    out_file = NamedTemporaryFile(delete=False, suffix=".mp4")
-    temp_files.append(out_file.name)
-    final_video.write_videofile(out_file.name, fps=data.fps, codec="libx264", audio_codec="aac")
     try:
-        with open(out_file.name, "rb") as f:
-            key = f"generated_videos/{uuid.uuid4()}.mp4"
-            await safe_s3_upload(f, key, "video/mp4")
-        return f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+        with metrics.stage("prefetch"):
+            assets = await prefetch_scene_assets(data, cfg, temp_files)
+        paths = [assets.intro_path, *assets.image_paths, *assets.audio_paths]
+        digests = await asyncio.to_thread(lambda: [_file_digest(p) if p else "" for p in paths])
+        engine = RENDER_ENGINE or cfg.get("render_engine", "moviepy")
+        # durations, outro text and engine change the output for the same input
+        cache_key = render_cache.result_key(
+            render_cache.input_hash(data.model_dump()), digests, {**cfg, "render_engine": engine}
+        )
+        if not data.no_cache:
+            cached_url = render_cache.get_result(cache_key)
+            if cached_url:
+                logger.info(f"[{data.template_id}] Render cache hit: {cached_url}")
+                return cached_url
+        plan = build_render_plan(data, cfg, assets)
+        key = f"generated_videos/{uuid.uuid4()}.mp4"
+        used = await render_and_upload(plan, engine, key, temp_files)
+        logger.info(f"[{data.template_id}] Rendered with {used} engine.")
+        url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+        render_cache.store_result(cache_key, url)
+        return url
     finally:
         for p in temp_files:
             try:
@@ -321,109 +542,31 @@ async def generate_video_async(data: VideoInput) -> str:
             except OSError:
                 pass
 
-async def create_meta_ad_async(data: MetaAdInput) -> dict:
-    token = data.user_id  # For demo we treat user_id as token key
-    FacebookAdsApi.init(access_token=token)
-    account = AdAccount(f"act_{data.ad_account_id}")
-    campaign_id = data.campaign_id
-    if not campaign_id:
-        campaign = account.create_campaign(params={
-            Campaign.Field.name: data.campaign_name or "Generated Campaign",
-            Campaign.Field.status: Campaign.Status.paused,
-            Campaign.Field.objective: data.objective,
-        })
-        campaign_id = campaign[Campaign.Field.id]
-    adset_id = data.adset_id
-    if not adset_id:
-        adset = account.create_ad_set(params={
-            AdSet.Field.name: data.adset_name or "Generated Ad Set",
-            AdSet.Field.campaign_id: campaign_id,
-            AdSet.Field.daily_budget: str(data.daily_budget),
-            AdSet.Field.billing_event: AdSet.BillingEvent.impressions,
-            AdSet.Field.optimization_goal: AdSet.OptimizationGoal.link_clicks,
-            AdSet.Field.targeting: {"geo_locations": {"countries": ["US"]}},
-            AdSet.Field.status: AdSet.Status.paused,
-        })
-        adset_id = adset[AdSet.Field.id]
-    creative_spec = {
-        "page_id": data.page_id,
-        "link_data": {
-            "message": data.body,
-            "link": data.link_url,
-            "call_to_action": {"type": data.cta},
-            "name": data.headline,
-        },
+def _campaign_params(cfg) -> dict:
+    return {
+        "name": cfg.campaign_name or "Generated Campaign",
+        "status": "PAUSED",
+        "objective": cfg.objective,
     }
-    if data.image_hash:
-        creative_spec["link_data"]["image_hash"] = data.image_hash
-    if data.video_id:
-        creative_spec["video_data"] = {"video_id": data.video_id}
-    creative = account.create_ad_creative(params={
-        AdCreative.Field.name: "Generated Creative",
-        AdCreative.Field.object_story_spec: creative_spec,
-    })
-    ad = account.create_ad(params={
-        Ad.Field.name: "Generated Ad",
-        Ad.Field.adset_id: adset_id,
-        Ad.Field.creative: {"creative_id": creative[AdCreative.Field.id]},
-        Ad.Field.status: Ad.Status.paused,
-    })
-    return {"ad_id": ad[Ad.Field.id], "campaign_id": campaign_id, "adset_id": adset_id}
 
 
-async def publish_meta_ad_async(cfg: CampaignConfigInput) -> dict:
-    """Upload an asset and create a scheduled ad."""
-    token = cfg.access_token
-    FacebookAdsApi.init(access_token=token)
-    account = AdAccount(f"act_{cfg.ad_account_id}")
-
-    camp_id = cfg.campaign_id
-    if not camp_id:
-        campaign = account.create_campaign(params={
-            Campaign.Field.name: cfg.campaign_name or "Generated Campaign",
-            Campaign.Field.status: Campaign.Status.paused,
-            Campaign.Field.objective: cfg.objective,
-        })
-        camp_id = campaign[Campaign.Field.id]
+def _adset_params(cfg, campaign_id: str) -> dict:
+    start_time = getattr(cfg, "start_time", None)
+    end_time = getattr(cfg, "end_time", None)
+    return {
+        "name": cfg.adset_name or "Generated Ad Set",
+        "campaign_id": campaign_id,
+        "daily_budget": str(cfg.daily_budget),
+        "billing_event": "IMPRESSIONS",
+        "optimization_goal": "LINK_CLICKS",
+        "targeting": {"geo_locations": {"countries": ["US"]}},
+        "status": "PAUSED",
+        "start_time": int(start_time.timestamp()) if start_time else None,
+        "end_time": int(end_time.timestamp()) if end_time else None,
+    }
 
-    adset_id = cfg.adset_id
-    if not adset_id:
-        params = {
-            AdSet.Field.name: cfg.adset_name or "Generated Ad Set",
-            AdSet.Field.campaign_id: camp_id,
-            AdSet.Field.daily_budget: str(cfg.daily_budget),
-            AdSet.Field.billing_event: AdSet.BillingEvent.impressions,
-            AdSet.Field.optimization_goal: AdSet.OptimizationGoal.link_clicks,
-            AdSet.Field.targeting: {"geo_locations": {"countries": ["US"]}},
-            AdSet.Field.status: AdSet.Status.paused,
-        }
-        if cfg.start_time:
-            params[AdSet.Field.start_time] = int(cfg.start_time.timestamp())
-        if cfg.end_time:
-            params[AdSet.Field.end_time] = int(cfg.end_time.timestamp())
-        adset = account.create_ad_set(params=params)
-        adset_id = adset[AdSet.Field.id]
-
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(cfg.asset_url)
-        resp.raise_for_status()
-        suffix = ".mp4" if cfg.asset_type == "video" else ".png"
-        tmp = NamedTemporaryFile(delete=False, suffix=suffix)
-        tmp.write(resp.content)
-        tmp.flush()
-
-    if cfg.asset_type == "video":
-        video = AdVideo(parent_id=account.get_id())
-        video[AdVideo.Field.filename] = tmp.name
-        video.remote_create()
-        asset_ref = {"video_id": video[AdVideo.Field.id]}
-    else:
-        ad_image = AdImage(parent_id=account.get_id())
-        ad_image[AdImage.Field.filename] = tmp.name
-        ad_image.remote_create()
-        asset_ref = {"image_hash": ad_image[AdImage.Field.hash]}
-    os.unlink(tmp.name)
 
+def _creative_spec(cfg, image_hash: Optional[str] = None, video_id: Optional[str] = None) -> dict:
     creative_spec = {
         "page_id": cfg.page_id,
         "link_data": {
@@ -433,39 +576,305 @@ async def publish_meta_ad_async(cfg: CampaignConfigInput) -> dict:
             "name": cfg.headline,
         },
     }
-    if cfg.asset_type == "video":
-        creative_spec["video_data"] = asset_ref
-    else:
-        creative_spec["link_data"].update(asset_ref)
-
-    creative = account.create_ad_creative(params={
-        AdCreative.Field.name: "Generated Creative",
-        AdCreative.Field.object_story_spec: creative_spec,
-    })
-    ad = account.create_ad(params={
-        Ad.Field.name: "Generated Ad",
-        Ad.Field.adset_id: adset_id,
-        Ad.Field.creative: {"creative_id": creative[AdCreative.Field.id]},
-        Ad.Field.status: Ad.Status.paused,
-    })
-    return {"ad_id": ad[Ad.Field.id], "campaign_id": camp_id, "adset_id": adset_id}
-
-
-@celery_app.task(name="generate_video_task")
-def generate_video_task(data: dict) -> str:
+    if image_hash:
+        creative_spec["link_data"]["image_hash"] = image_hash
+    if video_id:
+        creative_spec["video_data"] = {"video_id": video_id}
+    return creative_spec
+
+
+def _ad_steps(account: str, adset_id: str, creative_spec: dict, suffix: str = "") -> List[tuple]:
+    """``(name, method, path, params)`` for a creative and the ad that uses it."""
+    return [
+        (f"create_creative{suffix}", "POST", f"{account}/adcreatives", {
+            "name": "Generated Creative",
+            "object_story_spec": creative_spec,
+        }),
+        (f"create_ad{suffix}", "POST", f"{account}/ads", {
+            "name": "Generated Ad",
+            "adset_id": adset_id,
+            "creative": {"creative_id": meta_batch.reference(f"create_creative{suffix}")},
+            "status": "PAUSED",
+        }),
+    ]
+
+
+async def create_ad_chain(token: str, cfg, creative_spec: dict) -> dict:
+    """Create campaign, ad set, creative and ad in one Graph batch request."""
+    account = f"act_{cfg.ad_account_id}"
+    batch = meta_batch.GraphBatch()
+    campaign_id = cfg.campaign_id
+    if not campaign_id:
+        campaign_id = batch.add("create_campaign", "POST", f"{account}/campaigns", _campaign_params(cfg))
+    adset_id = cfg.adset_id
+    if not adset_id:
+        adset_id = batch.add("create_adset", "POST", f"{account}/adsets", _adset_params(cfg, campaign_id))
+    for step in _ad_steps(account, adset_id, creative_spec):
+        batch.add(*step)
+    task_progress.report("creating_ad", steps=len(batch))
+    results = await batch.execute(token)
+    return {
+        "ad_id": results["create_ad"]["id"],
+        "campaign_id": results.get("create_campaign", {}).get("id", cfg.campaign_id),
+        "adset_id": results.get("create_adset", {}).get("id", cfg.adset_id),
+    }
+
+
+async def upload_meta_asset(token: str, ad_account_id: str, asset_type: str, asset_url: str) -> dict:
+    """Upload an asset to the ad account; returns its creative reference (``video_id`` or ``image_hash``)."""
+    account = f"act_{ad_account_id}"
+    if asset_type == "video":
+        # Graph fetches the file itself, so the worker never downloads the video
+        video = await meta_batch.post(f"{account}/advideos", {"file_url": asset_url}, token)
+        return {"video_id": video["id"]}
+    resp = await http_pool.get_client().get(asset_url)
+    resp.raise_for_status()
+    image = await meta_batch.post(f"{account}/adimages", {"bytes": base64.b64encode(resp.content).decode()}, token)
+    return {"image_hash": next(iter(image["images"].values()))["hash"]}
+
+
+async def create_meta_ad_async(data: MetaAdInput) -> dict:
+    token = data.user_id  # For demo we treat user_id as token key
+    return await create_ad_chain(token, data, _creative_spec(data, data.image_hash, data.video_id))
+
+
+async def publish_meta_ad_async(cfg: CampaignConfigInput) -> dict:
+    """Upload an asset and create a scheduled ad."""
+    token = cfg.access_token
+    task_progress.report("uploading")
+    asset_ref = await upload_meta_asset(token, cfg.ad_account_id, cfg.asset_type, cfg.asset_url)
+    return await create_ad_chain(token, cfg, _creative_spec(cfg, **asset_ref))
+
+
+def _campaign_key(item: MetaPublishItem) -> tuple:
+    if item.campaign_id:
+        return (item.ad_account_id, item.campaign_id)
+    return (item.ad_account_id, None, item.campaign_name, item.objective)
+
+
+def _adset_key(item: MetaPublishItem) -> tuple:
+    if item.adset_id:
+        return (item.ad_account_id, item.adset_id)
+    return (_campaign_key(item), None, item.adset_name, item.daily_budget, item.start_time, item.end_time)
+
+
+def _asset_key(item: MetaPublishItem) -> tuple:
+    return (item.ad_account_id, item.asset_type, item.asset_url)
+
+
+async def _create_shared(token: str, stage: str, edge: str, pending: dict, params) -> dict:
+    """Create one object per key of ``pending`` (key -> ``(item, parent)``) in batches.
+
+    Returns key -> new id, or key -> the exception that prevented it.
+    """
+    if not pending:
+        return {}
+    task_progress.report(stage, count=len(pending))
+    names = {key: f"{edge}_{n}" for n, key in enumerate(pending)}
+    groups = [
+        [(names[key], "POST", f"act_{item.ad_account_id}/{edge}", params(item, parent))]
+        for key, (item, parent) in pending.items()
+    ]
+    results, errors = await meta_batch.execute_grouped(token, groups)
+    return {key: results[name]["id"] if name in results else errors[name] for key, name in names.items()}
+
+
+async def bulk_publish_meta_ads_async(data: BulkPublishInput) -> dict:
+    """Publish many ads, creating each distinct campaign, ad set and asset once.
+
+    Items are grouped by ``(account, campaign, ad set)`` spec. Assets upload
+    while the shared parents are created; creatives and ads then go out in
+    batched Graph calls. One failing item never fails the others.
+    """
+    token = data.access_token
+    items = data.items
+
+    async def upload_assets() -> dict:
+        keys = list(dict.fromkeys(_asset_key(item) for item in items))
+        step = task_progress.counter("uploading", len(keys))
+        slots = asyncio.Semaphore(META_UPLOAD_CONCURRENCY)
+
+        async def upload(key: tuple):
+            async with slots:
+                try:
+                    return await upload_meta_asset(token, *key)
+                except Exception as e:
+                    logger.warning(f"[meta] Could not upload {key[2]}: {e}")
+                    return e
+                finally:
+                    step()
+
+        return dict(zip(keys, await asyncio.gather(*(upload(key) for key in keys))))
+
+    async def create_parents() -> tuple:
+        campaigns = {}
+        new_campaigns = {}
+        for item in items:
+            if item.adset_id:
+                continue
+            key = _campaign_key(item)
+            if item.campaign_id:
+                campaigns[key] = item.campaign_id
+            else:
+                new_campaigns.setdefault(key, (item, None))
+        campaigns.update(await _create_shared(token, "creating_campaign", "campaigns", new_campaigns, lambda item, _: _campaign_params(item)))
+
+        adsets = {}
+        new_adsets = {}
+        for item in items:
+            key = _adset_key(item)
+            if item.adset_id:
+                adsets[key] = item.adset_id
+            elif key not in adsets and key not in new_adsets:
+                campaign = campaigns[_campaign_key(item)]
+                if isinstance(campaign, Exception):
+                    adsets[key] = campaign
+                else:
+                    new_adsets[key] = (item, campaign)
+        adsets.update(await _create_shared(token, "creating_adset", "adsets", new_adsets, _adset_params))
+        return campaigns, adsets
+
+    assets, (campaigns, adsets) = await asyncio.gather(upload_assets(), create_parents())
+
+    statuses = []
+    groups = []
+    for index, item in enumerate(items):
+        adset = adsets[_adset_key(item)]
+        asset = assets[_asset_key(item)]
+        campaign = item.campaign_id if item.adset_id else campaigns[_campaign_key(item)]
+        status = {
+            "index": index,
+            "campaign_id": campaign if isinstance(campaign, str) else None,
+            "adset_id": adset if isinstance(adset, str) else None,
+        }
+        statuses.append(status)
+        failure = next((x for x in (campaign, adset, asset) if isinstance(x, Exception)), None)
+        if failure is not None:
+            status.update(status="failed", error=str(failure))
+            continue
+        groups.append(_ad_steps(f"act_{item.ad_account_id}", adset, _creative_spec(item, **asset), suffix=f"_{index}"))
+
+    task_progress.report("creating_ad", count=len(groups))
+    results, errors = await meta_batch.execute_grouped(token, groups) if groups else ({}, {})
+    for status in statuses:
+        if "status" in status:
+            continue
+        index = status["index"]
+        if f"create_ad_{index}" in results:
+            status.update(status="created", ad_id=results[f"create_ad_{index}"]["id"])
+        else:
+            error = errors.get(f"create_creative_{index}") or errors[f"create_ad_{index}"]
+            status.update(status="failed", error=str(error))
+    created = sum(s["status"] == "created" for s in statuses)
+    return {"created": created, "failed": len(statuses) - created, "items": statuses}
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro):
+    """Run ``coro`` on this process' long-lived loop so pooled connections survive between tasks."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def warm_text_cache(**kwargs):
+    """Rasterize every template outro so renders never draw them cold."""
+    for cfg in VIDEO_TEMPLATE_CONFIGS.values():
+        for size in TEXT_WARM_SIZES:
+            text_raster.render_text(cfg["final_outro_text"], fontsize=cfg["text_fontsize"], canvas_size=size)
+    logger.info(f"Warmed text raster cache: {text_raster.text_cache.stats()}")
+
+
+# tasks whose progress clients can follow
+PROGRESS_TASKS = {"generate_video_task", "create_meta_ad_task", "publish_meta_ad_task", "bulk_publish_meta_ads_task"}
+
+
+@task_prerun.connect
+def start_progress(task_id=None, task=None, **kwargs):
+    if task.name in PROGRESS_TASKS:
+        task_progress.start(task_id)
+
+
+@task_postrun.connect
+def finish_progress(task_id=None, task=None, retval=None, state=None, **kwargs):
+    if task.name in PROGRESS_TASKS:
+        task_progress.finish(task_id, state == "SUCCESS", retval)
+
+
+@worker_init.connect
+def start_metrics_server(sender=None, **kwargs):
+    # pool_cls is a name like "prefork" or the pool class itself
+    pool = getattr(sender, "pool_cls", None) or celery_app.conf.worker_pool
+    pool_name = pool if isinstance(pool, str) else pool.__module__
+    metrics.add_collector(metrics.QueueDepthCollector(BROKER_URL))
+    metrics.start_worker_server(forking="prefork" in pool_name)
+
+
+@worker_init.connect
+def preload_providers(**kwargs):
+    """Import PRELOAD_PROVIDERS before the pool forks so children share the pages."""
+    providers.preload()
+
+
+@worker_process_shutdown.connect
+def release_metrics(pid=None, **kwargs):
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+@celery_app.task(name="http_pool_stats")
+def http_pool_stats_task() -> dict:
+    """Return connection pool statistics of this worker process."""
+    return http_pool.stats()
+
+
+@celery_app.task(name="asset_cache_stats")
+def asset_cache_stats_task() -> dict:
+    """Return hit/miss/eviction counters of this worker's asset cache."""
+    return asset_cache.stats()
+
+
+@celery_app.task(name="generate_video_task", bind=True)
+def generate_video_task(self, data: dict) -> str:
     """Background task to create a video from scene definitions."""
     inp = VideoInput(**data)
-    return asyncio.run(generate_video_async(inp))
+    digest = render_cache.input_hash(inp.model_dump())
+    try:
+        # if this process dies, the claim expires within RENDER_HEARTBEAT_TTL
+        with render_cache.heartbeat(digest, self.request.id):
+            return run_async(generate_video_async(inp))
+    finally:
+        render_cache.release_inflight(digest, self.request.id)
+
+
+@task_revoked.connect
+def release_revoked_render(request=None, **kwargs):
+    """A render revoked before or while running never reaches the task's ``finally``."""
+    if request is None or request.task_name != "generate_video_task" or not request.args:
+        return
+    digest = render_cache.input_hash(VideoInput(**request.args[0]).model_dump())
+    render_cache.release_inflight(digest, request.id)
 
 @celery_app.task(name="create_meta_ad_task")
 def create_meta_ad_task(data: dict) -> dict:
     """Background task to create a Meta ad campaign and creative."""
     inp = MetaAdInput(**data)
-    return asyncio.run(create_meta_ad_async(inp))
+    return run_async(create_meta_ad_async(inp))
 
 
 @celery_app.task(name="publish_meta_ad_task")
 def publish_meta_ad_task(data: dict) -> dict:
     """Background task to upload an asset and create a scheduled Meta ad."""
     inp = CampaignConfigInput(**data)
-    return asyncio.run(publish_meta_ad_async(inp))
+    return run_async(publish_meta_ad_async(inp))
+
+
+@celery_app.task(name="bulk_publish_meta_ads_task")
+def bulk_publish_meta_ads_task(data: dict) -> dict:
+    """Background task to publish many Meta ads, sharing campaigns, ad sets and assets."""
+    inp = BulkPublishInput(**data)
+    return run_async(bulk_publish_meta_ads_async(inp))
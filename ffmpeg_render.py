@@ -0,0 +1,188 @@
+"""ffmpeg render engine: compiles a RenderPlan into one native filtergraph."""
+
+import os
+import asyncio
+import logging
+import tempfile
+from typing import Callable, List, Optional
+
+from PIL import Image
+
+import metrics
+from render_plan import RenderPlan
+from text_raster import render_text
+
+logger = logging.getLogger(__name__)
+
+class FFmpegRenderError(RuntimeError):
+    pass
+
+
+def ffmpeg_binary() -> str:
+    """Use FFMPEG_BINARY, else the binary moviepy already depends on."""
+    if os.getenv("FFMPEG_BINARY"):
+        return os.getenv("FFMPEG_BINARY")
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+class _Graph:
+    """Accumulates ffmpeg inputs and filtergraph chains."""
+
+    def __init__(self):
+        self.inputs: List[str] = []
+        self.filters: List[str] = []
+        self.n_inputs = 0
+
+    def add_input(self, *args: str) -> int:
+        self.inputs.extend(args)
+        self.n_inputs += 1
+        return self.n_inputs - 1
+
+
+def _add_audio(graph: _Graph, plan: RenderPlan, video_duration: float) -> bool:
+    """Add the narration track as ``[aout]``; False when no scene is narrated."""
+    # mirrors moviepy: narrated scenes are concatenated back to back, then
+    # trimmed or looped to the video length when the template fixes one
+    narrated = [s for s in plan.scenes if s.audio_path]
+    if not narrated:
+        return False
+    audio_labels = []
+    for i, scene in enumerate(narrated):
+        idx = graph.add_input("-i", scene.audio_path)
+        graph.filters.append(
+            f"[{idx}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,"
+            f"apad,atrim=duration={scene.duration},asetpts=PTS-STARTPTS[a{i}]"
+        )
+        audio_labels.append(f"[a{i}]")
+    graph.filters.append(f"{''.join(audio_labels)}concat=n={len(audio_labels)}:v=0:a=1[acat]")
+    audio_duration = sum(s.duration for s in narrated)
+    if plan.total_duration and audio_duration > video_duration:
+        graph.filters.append(f"[acat]atrim=duration={video_duration}[aout]")
+    elif plan.total_duration and audio_duration < video_duration:
+        graph.filters.append(f"[acat]aloop=loop=-1:size=2147483647,atrim=duration={video_duration}[aout]")
+    else:
+        graph.filters.append("[acat]anull[aout]")
+    return True
+
+
+def output_duration(plan: RenderPlan) -> float:
+    return plan.total_duration or plan.timeline_duration
+
+
+def build_command(plan: RenderPlan, out_path: str, work_dir: str) -> List[str]:
+    """Return the ffmpeg argv that renders ``plan`` to ``out_path``."""
+    w, h, fps = plan.width, plan.height, plan.fps
+    norm = f"scale={w}:{h},setsar=1,fps={fps},format=yuv420p"
+    black = f"color=c=black:s={w}x{h}:r={fps}"
+    graph = _Graph()
+    video_labels: List[str] = []
+
+    def add_segment(source: str, chain: str, text: Optional[str] = None, fontsize: int = 48, duration: float = 0) -> None:
+        label = f"v{len(video_labels)}"
+        if text:
+            # pre-rastered text is overlaid, so ffmpeg needs no font support
+            fd, png = tempfile.mkstemp(dir=work_dir, suffix=".png")
+            os.close(fd)
+            Image.fromarray(render_text(text, fontsize=fontsize, canvas_size=(w, h))).save(png)
+            txt = graph.add_input("-loop", "1", "-t", f"{duration}", "-i", png)
+            graph.filters.append(f"{source}{chain}[{label}bg]")
+            graph.filters.append(f"[{label}bg][{txt}:v]overlay=(W-w)/2:(H-h)/2:shortest=1,format=yuv420p[{label}]")
+        else:
+            graph.filters.append(f"{source}{chain}[{label}]")
+        video_labels.append(f"[{label}]")
+
+    if plan.intro_path:
+        d = plan.intro_duration
+        idx = graph.add_input("-i", plan.intro_path)
+        add_segment(f"[{idx}:v]", f"{norm},tpad=stop_mode=clone:stop_duration={d},trim=duration={d},setpts=PTS-STARTPTS")
+    for scene in plan.scenes:
+        if scene.image_path:
+            idx = graph.add_input("-loop", "1", "-framerate", str(fps), "-t", f"{scene.duration}", "-i", scene.image_path)
+        else:
+            idx = graph.add_input("-f", "lavfi", "-t", f"{scene.duration}", "-i", black)
+        add_segment(f"[{idx}:v]", norm, scene.text, scene.text_fontsize, scene.duration)
+    if plan.include_outro:
+        idx = graph.add_input("-f", "lavfi", "-t", f"{plan.outro_duration}", "-i", black)
+        add_segment(f"[{idx}:v]", norm, plan.outro_text, plan.outro_fontsize, plan.outro_duration)
+
+    graph.filters.append(f"{''.join(video_labels)}concat=n={len(video_labels)}:v=1:a=0[vcat]")
+    timeline = plan.timeline_duration
+    if plan.total_duration and timeline > plan.total_duration:
+        graph.filters.append(f"[vcat]trim=duration={plan.total_duration},setpts=PTS-STARTPTS[vout]")
+    elif plan.total_duration and timeline < plan.total_duration:
+        graph.filters.append(f"[vcat]tpad=stop_mode=add:stop_duration={plan.total_duration - timeline}:color=black[vout]")
+    else:
+        graph.filters.append("[vcat]null[vout]")
+    has_audio = plan.include_audio and _add_audio(graph, plan, output_duration(plan))
+
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y", *graph.inputs]
+    cmd += ["-filter_complex", ";".join(graph.filters), "-map", "[vout]"]
+    if has_audio:
+        cmd += ["-map", "[aout]", "-c:a", plan.audio_codec]
+    cmd += ["-r", str(fps), *video_codec_args(plan), "-movflags", plan.movflags, "-f", "mp4", out_path]
+    return cmd
+
+
+def video_codec_args(plan: RenderPlan) -> List[str]:
+    """Encoder settings shared by every path that may be stream-copied together."""
+    return ["-c:v", plan.codec, "-pix_fmt", "yuv420p"]
+
+
+def build_join_command(segment_list: str, plan: RenderPlan, out_path: str) -> List[str]:
+    """Concat pre-encoded segments by stream copy and lay the narration over them."""
+    graph = _Graph()
+    graph.add_input("-f", "concat", "-safe", "0", "-i", segment_list)
+    has_audio = plan.include_audio and _add_audio(graph, plan, output_duration(plan))
+    cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y", *graph.inputs]
+    if has_audio:
+        cmd += ["-filter_complex", ";".join(graph.filters), "-map", "0:v", "-map", "[aout]", "-c:a", plan.audio_codec]
+    else:
+        cmd += ["-map", "0:v"]
+    cmd += ["-c:v", "copy", "-movflags", plan.movflags, "-f", "mp4", out_path]
+    return cmd
+
+
+def write_concat_list(paths: List[str], list_path: str) -> None:
+    with open(list_path, "w") as fh:
+        for path in paths:
+            escaped = path.replace("'", "'\\''")
+            fh.write(f"file '{escaped}'\n")
+
+
+async def run(cmd: List[str], progress: Optional[Callable[[float], None]] = None, duration: float = 0) -> None:
+    """Run an ffmpeg command; ``progress`` gets the percent of ``duration`` written so far."""
+    if progress is None or not duration:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
+    else:
+        proc = await asyncio.create_subprocess_exec(
+            cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:],
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def read_progress() -> None:
+            async for line in proc.stdout:
+                name, _, value = line.decode(errors="replace").strip().partition("=")
+                if name == "out_time_us" and value.isdigit():
+                    progress(min(100.0, int(value) / 1e4 / duration))
+
+        _, stderr = await asyncio.gather(read_progress(), proc.stderr.read())
+        await proc.wait()
+    if proc.returncode != 0:
+        raise FFmpegRenderError(stderr.decode(errors="replace")[-2000:])
+
+
+async def render(plan: RenderPlan, out_path: str, progress: Optional[Callable[[float], None]] = None) -> None:
+    """Render ``plan`` with a single ffmpeg process."""
+    with tempfile.TemporaryDirectory(prefix="ffrender-") as work_dir:
+        with metrics.stage("clip_build"):
+            cmd = build_command(plan, out_path, work_dir)
+        with metrics.stage("encode"):
+            await run(cmd, progress, output_duration(plan))
@@ -0,0 +1,168 @@
+"""Process-wide pooled ``httpx.AsyncClient`` with connection-pool statistics.
+
+The API opens the pool in its FastAPI lifespan handler; the Celery worker
+creates one lazily per process (bound to that process' event loop).
+"""
+
+import os
+import time
+import asyncio
+import logging
+import importlib.util
+from collections import defaultdict
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_WRITE_TIMEOUT = float(os.getenv("HTTP_WRITE_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP2 = os.getenv("HTTP2", "1") == "1"
+
+# httpcore trace events that mark the end of waiting for a pooled connection
+_CONNECTION_ACQUIRED = (
+    "connection.connect_tcp.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its per-host slot once consumed or closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, sem: asyncio.Semaphore):
+        self._stream = stream
+        self._sem = sem
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._sem.release()
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """Transport that caps connections per host and records pool wait time."""
+
+    def __init__(self, max_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST, **kwargs):
+        super().__init__(**kwargs)
+        self._host_slots: Dict[tuple, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(max_per_host))
+        self.requests = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        waited = []
+        user_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict) -> None:
+            if not waited and event_name in _CONNECTION_ACQUIRED:
+                waited.append(time.perf_counter() - start)
+            if user_trace is not None:
+                result = user_trace(event_name, info)
+                if asyncio.iscoroutine(result):
+                    await result
+
+        request.extensions["trace"] = trace
+        sem = self._host_slots[(request.url.scheme, request.url.host, request.url.port)]
+        await sem.acquire()
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            sem.release()
+            raise
+        wait = waited[0] if waited else time.perf_counter() - start
+        self.requests += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        response.stream = _ReleasingStream(response.stream, sem)
+        return response
+
+    def stats(self) -> dict:
+        connections = getattr(self._pool, "connections", [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "requests": self.requests,
+            "avg_wait_ms": 1000 * self.wait_total / self.requests if self.requests else 0.0,
+            "max_wait_ms": 1000 * self.wait_max,
+        }
+
+
+def _http2_available() -> bool:
+    if not HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2=1 but the h2 package is missing; using HTTP/1.1.")
+        return False
+    return True
+
+
+def create_client() -> httpx.AsyncClient:
+    transport = PooledTransport(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    timeout = httpx.Timeout(
+        connect=HTTP_CONNECT_TIMEOUT,
+        read=HTTP_READ_TIMEOUT,
+        write=HTTP_WRITE_TIMEOUT,
+        pool=HTTP_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def open_pool() -> httpx.AsyncClient:
+    global _client, _client_loop
+    await close_pool()
+    _client = create_client()
+    _client_loop = asyncio.get_running_loop()
+    return _client
+
+
+async def close_pool() -> None:
+    global _client
+    if _client is not None and not _client.is_closed and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """The pool for the running event loop, created on first use."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = create_client()
+        _client_loop = loop
+    return _client
+
+
+def stats() -> dict:
+    if _client is None:
+        return {"connections": 0, "active": 0, "idle": 0, "requests": 0, "avg_wait_ms": 0.0, "max_wait_ms": 0.0}
+    return _client._transport.stats()
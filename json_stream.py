@@ -0,0 +1,54 @@
+"""Incremental parser for a JSON array of objects arriving in text chunks."""
+
+import json
+from typing import Iterator, List
+
+
+class ArrayItemParser:
+    """Yield each object (or nested array) in a JSON array as soon as it is complete.
+
+    Anything before the opening ``[`` (e.g. a Markdown code fence) and after
+    the closing ``]`` is ignored, so raw LLM output can be fed as is.
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> Iterator[object]:
+        for ch in chunk:
+            if self.done:
+                return
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+            if self._depth == 0:
+                # between elements: only a new element or the end of the array matters
+                if ch == "]":
+                    self.done = True
+                elif ch in "{[":
+                    self._depth = 1
+                    self._buf = [ch]
+                continue
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    yield json.loads("".join(self._buf))
+                    self._buf = []
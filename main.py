@@ -1,8 +1,12 @@
 import os
-import io
+import re
+import json
 import uuid
+import time
+import hashlib
 import logging
 import asyncio
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from tempfile import NamedTemporaryFile
 
@@ -11,20 +15,27 @@ from celery import Celery
 import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, status
+from fastapi import FastAPI, HTTPException, Query, Request, Response, UploadFile, File, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
-import google.generativeai as genai
-import boto3
-from openai import AsyncOpenAI
-from facebook_business.api import FacebookAdsApi
-from facebook_business.adobjects.adimage import AdImage
-from facebook_business.adobjects.advideo import AdVideo
+
+import ads_store
+import http_pool
+import metrics
+import providers
+import render_cache
+import s3_stream
+import state_backend
+import task_progress
+from response_cache import TieredCache
+from json_stream import ArrayItemParser
+from rate_limit import TokenBucket
 
 load_dotenv()
 
@@ -45,8 +56,13 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change_me")
 DEMO_USERNAME = os.getenv("DEMO_USERNAME", "demo")
 DEMO_PASSWORD = os.getenv("DEMO_PASSWORD", "password")
 
-# simple in-memory user store for demo purposes
-USERS = {DEMO_USERNAME: DEMO_PASSWORD}
+# users ("users"), linked Meta tokens ("meta_tokens", "meta_user_ids") and uploaded
+# 3D models ("models"); STATE_BACKEND=redis shares them between API processes
+shared_state = state_backend.create_backend()
+# part of every collection ETag so counters reset by a restart never repeat old tags;
+# replaced at start-up by the epoch shared through STATE_BACKEND
+ETAG_EPOCH = uuid.uuid4().hex[:12]
+
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -59,57 +75,69 @@ if not OPENAI_API_KEY:
 if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION, S3_BUCKET_NAME]):
     raise ValueError("AWS credentials or S3 bucket configuration missing.")
 
-openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-
-# simple in-memory storage for Meta user tokens
-TOKEN_STORE = {}
+# Direct uploads larger than this are split into presigned multipart parts
+PRESIGN_MULTIPART_THRESHOLD = int(os.getenv("PRESIGN_MULTIPART_THRESHOLD", str(64 * 1024 ** 2)))
+PRESIGN_EXPIRES = int(os.getenv("PRESIGN_EXPIRES", "900"))
+# Largest direct upload accepted; bounds how many part URLs one request signs
+PRESIGN_MAX_SIZE = int(os.getenv("PRESIGN_MAX_SIZE", str(5 * 1024 ** 3)))
+# S3 rejects part numbers above this
+S3_MAX_PARTS = 10_000
+
+# DALL-E quota shared by every image request in this process (images per minute)
+OPENAI_IMAGES_PER_MINUTE = float(os.getenv("OPENAI_IMAGES_PER_MINUTE", "5"))
+IMAGE_VARIATIONS_MAX = int(os.getenv("IMAGE_VARIATIONS_MAX", "8"))
+dalle_limiter = TokenBucket(OPENAI_IMAGES_PER_MINUTE)
+
+AD_COPY_MODEL = os.getenv("AD_COPY_MODEL", "gemini-pro")
+AD_COPY_TEMPERATURE = float(os.getenv("AD_COPY_TEMPERATURE", "0.7"))
+# Ad copy cache: per-process LRU backed by a shared Redis tier ("" disables Redis)
+AD_COPY_CACHE_SIZE = int(os.getenv("AD_COPY_CACHE_SIZE", "1024"))
+AD_COPY_CACHE_TTL = int(os.getenv("AD_COPY_CACHE_TTL", "86400"))
+AD_COPY_CACHE_URL = os.getenv("AD_COPY_CACHE_URL", CELERY_BROKER_URL)
+# Batch generation: concurrent Gemini calls per batch, products per packed prompt
+AD_COPY_BATCH_CONCURRENCY = int(os.getenv("AD_COPY_BATCH_CONCURRENCY", "8"))
+AD_COPY_BATCH_MAX_ITEMS = int(os.getenv("AD_COPY_BATCH_MAX_ITEMS", "500"))
+AD_COPY_PACK_SIZE = int(os.getenv("AD_COPY_PACK_SIZE", "5"))
+# Ads accepted by one /api/v1/platforms/meta/publish_ads call
+META_BULK_MAX_ITEMS = int(os.getenv("META_BULK_MAX_ITEMS", "200"))
 
 # Retry helpers for external services
-retry_config = dict(stop=stop_after_attempt(3), wait=wait_fixed(2))
+retry_config = dict(stop=stop_after_attempt(3), wait=wait_fixed(2), before_sleep=metrics.record_retry)
 
 @retry(**retry_config)
 async def safe_get(url: str) -> httpx.Response:
     logger.info("Fetching %s", url)
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return resp
-
-@retry(**retry_config)
-async def safe_s3_upload(fileobj, key: str, content_type: str):
-    logger.info("Uploading %s to S3", key)
-    await asyncio.to_thread(
-        s3_client.upload_fileobj,
-        fileobj,
-        S3_BUCKET_NAME,
-        key,
-        ExtraArgs={"ContentType": content_type, "ACL": "public-read"},
-    )
+    resp = await http_pool.get_client().get(url)
+    resp.raise_for_status()
+    return resp
 
 @retry(**retry_config)
 async def safe_dalle(prompt: str, size: str, quality: str):
+    await dalle_limiter.acquire()
     logger.info("Generating image via DALL-E")
-    return await openai_client.images.generate(
-        model="dall-e-3",
-        prompt=prompt,
-        size=size,
-        quality=quality,
-        n=1,
-    )
+    client = await providers.aget("openai")
+    try:
+        with metrics.upstream("openai", "images.generate"):
+            return await client.images.generate(
+                model="dall-e-3",
+                prompt=prompt,
+                size=size,
+                quality=quality,
+                n=1,
+            )
+    except Exception as e:
+        if getattr(e, "status_code", None) == 429:
+            # our budget was too optimistic: make every caller wait for fresh tokens
+            dalle_limiter.drain()
+        raise
 
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
-)
 
 celery_app = Celery('worker', broker=CELERY_BROKER_URL, backend=CELERY_BROKER_URL)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def authenticate_user(username: str, password: str) -> bool:
-    return USERS.get(username) == password
+async def authenticate_user(username: str, password: str) -> bool:
+    return await shared_state.get("users", username) == password
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -126,22 +154,78 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username not in USERS:
+        if await shared_state.get("users", username) is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     return username
 
-USER_MODELS: dict[str, list] = {}
-# simple store for saved ads in this demo
-USER_SAVED_ADS: dict[str, list] = {}
-_next_ad_id = 1
+# --- Conditional GET for per-user collections ---
+# Each collection ("ads", "models", "meta") has a version counter per user that
+# every write bumps, so a poll can be answered with 304 before loading anything.
+# "models" and "meta" keep theirs in STATE_BACKEND next to their data; the ads
+# store bumps its own in the same write, so ADS_STORE=sqlite workers agree on it.
+# There is no Last-Modified: at one-second resolution two writes in the same
+# second would be indistinguishable.
+
+async def touch_collection(collection: str, user: str) -> None:
+    await shared_state.incr("versions", f"{collection}:{user}")
+
+async def collection_headers(collection: str, user: str, variant: str = "") -> dict:
+    """ETag for the user's collection; read it before the data itself.
+
+    ``variant`` tells apart responses built from the same version, e.g. pages.
+    """
+    if collection == "ads":
+        tag = await saved_ads.version(user)
+    else:
+        version = await shared_state.counter("versions", f"{collection}:{user}")
+        tag = f"{ETAG_EPOCH}-{version}"
+    if variant:
+        tag += "-" + hashlib.sha256(variant.encode()).hexdigest()[:12]
+    return {"ETag": f'"{tag}"', "Cache-Control": "private, no-cache"}
+
+def not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or headers["ETag"] in tags
+
+# saved ads; ADS_STORE=sqlite shares them between uvicorn workers
+saved_ads = ads_store.create_store()
+
+# one handle for every ad copy request; the model object holds no per-call state
+@providers.register("ad_copy_model")
+def _ad_copy_model():
+    return providers.get("gemini").GenerativeModel(AD_COPY_MODEL)
+
+ad_copy_generation_config = dict(
+    temperature=AD_COPY_TEMPERATURE,
+    candidate_count=1
+)
 
-genai.configure(api_key=GEMINI_API_KEY)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one keep-alive pool for every outbound call made by this process
+    await http_pool.open_pool()
+    # warm PRELOAD_PROVIDERS in the background; requests that need them first just wait
+    preload = asyncio.create_task(asyncio.to_thread(providers.preload))
+    await shared_state.set_if_absent("users", DEMO_USERNAME, DEMO_PASSWORD)
+    global ETAG_EPOCH
+    await shared_state.set_if_absent("server", "etag_epoch", ETAG_EPOCH)
+    ETAG_EPOCH = await shared_state.get("server", "etag_epoch")
+    try:
+        yield
+    finally:
+        preload.cancel()
+        await http_pool.close_pool()
+        await shared_state.aclose()
 
 app = FastAPI(
     title="Social Ad Generator API",
-    description="API for generating social media ad copy, images, and videos using AI."
+    description="API for generating social media ad copy, images, and videos using AI.",
+    lifespan=lifespan,
 )
 
 # Configure CORS so the frontend can access the API
@@ -151,13 +235,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # lets the frontend read the /ads/my-ads pagination cursor and the cache validators
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+metrics.add_collector(metrics.QueueDepthCollector(CELERY_BROKER_URL))
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # label by route template so path parameters do not explode cardinality
+        route = request.scope.get("route")
+        metrics.REQUEST_SECONDS.labels(
+            request.method, route.path if route else "unmatched", str(status_code)
+        ).observe(time.perf_counter() - start)
+
+@app.get("/metrics")
+async def prometheus_metrics() -> Response:
+    body, content_type = await asyncio.to_thread(metrics.render_latest)
+    return Response(content=body, media_type=content_type)
+
 # Simple health check endpoint for uptime monitoring
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
 
+@app.get("/health/http-pool")
+async def http_pool_stats() -> dict:
+    return http_pool.stats()
+
 class AdCopyInput(BaseModel):
     product_name: str
     product_description: str = Field(..., max_length=500)
@@ -165,6 +277,8 @@ class AdCopyInput(BaseModel):
     marketing_goal: str
     ad_tone: Optional[str] = None
     num_variations: int = Field(2, ge=1, le=5)
+    # skip the cache and ask the model for new variations
+    fresh: bool = False
 
 class GeneratedAdCopy(BaseModel):
     headline: str
@@ -173,6 +287,19 @@ class GeneratedAdCopy(BaseModel):
 
 class AdCopyOutput(BaseModel):
     ad_copies: List[GeneratedAdCopy]
+    cached: bool = False
+
+class AdCopyBatchInput(BaseModel):
+    items: List[AdCopyInput] = Field(..., min_length=1)
+    # ask for several products in one prompt to save upstream calls
+    pack: bool = False
+
+class AdCopyBatchResult(BaseModel):
+    """One NDJSON line of a batch response; exactly one of ad_copies/error is set."""
+    index: int
+    ad_copies: Optional[List[GeneratedAdCopy]] = None
+    cached: bool = False
+    error: Optional[str] = None
 
 class ImageInput(BaseModel):
     prompt: str
@@ -181,12 +308,54 @@ class ImageInput(BaseModel):
     branding_elements: Optional[List[str]] = None
     quality: str = Field("standard", pattern=r"^(standard|hd)$")
 
+class ImageVariationsInput(ImageInput):
+    n: int = Field(4, ge=1)
+
+class ImageVariationsOutput(BaseModel):
+    # in the order the images finished
+    image_urls: List[str]
+    errors: List[str] = []
+
 class ImageOutput(BaseModel):
     image_url: str
 
 class TaskStatus(BaseModel):
     task_id: str
 
+# Direct-to-S3 upload schemas
+class PresignInput(BaseModel):
+    filename: str
+    content_type: str = "application/octet-stream"
+    size: int = Field(..., gt=0, le=PRESIGN_MAX_SIZE)
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+class PresignOutput(BaseModel):
+    key: str
+    method: str = "PUT"
+    # single PUT uploads
+    url: Optional[str] = None
+    headers: dict = {}
+    # multipart uploads: PUT each part to its URL, then report the ETags
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    parts: List[PresignedPart] = []
+
+class CompletedPart(BaseModel):
+    part_number: int
+    etag: str
+
+class UploadCompleteInput(BaseModel):
+    key: str
+    upload_id: Optional[str] = None
+    parts: List[CompletedPart] = []
+
+class UploadAbortInput(BaseModel):
+    key: str
+    upload_id: str
+
 class RegisterInput(BaseModel):
     username: str
     password: str
@@ -197,6 +366,7 @@ class VideoScene(BaseModel):
     text: Optional[str] = None
     duration: float = Field(..., gt=0)
     tts_text: Optional[str] = None
+    tts_lang: str = "en"
 
 class VideoInput(BaseModel):
     scenes: List[VideoScene]
@@ -205,14 +375,30 @@ class VideoInput(BaseModel):
     fps: int = 30
     template_id: str = "standard"
     model_url: Optional[str] = None
+    # skip the render result cache and in-flight coalescing
+    no_cache: bool = False
 
 class VideoOutput(BaseModel):
     video_url: str
 
+# Saved ad schemas
+class SavedAdCreate(BaseModel):
+    name: str
+    headline: Optional[str] = None
+    body: Optional[str] = None
+    cta: Optional[str] = None
+    image_url: Optional[str] = None
+    video_url: Optional[str] = None
+
+class SavedAdDisplay(SavedAdCreate):
+    id: int
+    user_id: str
+    created_at: datetime
+
 
 @app.post("/token")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    if not authenticate_user(form_data.username, form_data.password):
+    if not await authenticate_user(form_data.username, form_data.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
     access_token = create_access_token({"sub": form_data.username})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -220,110 +406,454 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 @app.post("/register")
 async def register(user: RegisterInput):
-    if user.username in USERS:
+    if not await shared_state.set_if_absent("users", user.username, user.password):
         raise HTTPException(status_code=400, detail="User already exists")
-    USERS[user.username] = user.password
     return {"message": "registered"}
 
 
 @app.post("/upload-model")
 async def upload_model(file: UploadFile = File(...), current_user: str = Depends(get_current_user)):
     key = f"models/{current_user}/{uuid.uuid4()}_{file.filename}"
-    await safe_s3_upload(file.file, key, file.content_type or "application/octet-stream")
+    await s3_stream.upload_file(file, await providers.aget("s3"), S3_BUCKET_NAME, key, file.content_type or "application/octet-stream")
     url = f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
-    USER_MODELS.setdefault(current_user, []).append({"id": uuid.uuid4().hex, "name": file.filename, "url": url})
+    await shared_state.append("models", current_user, {"id": uuid.uuid4().hex, "name": file.filename, "url": url})
+    await touch_collection("models", current_user)
+    return {"url": url}
+
+
+def _public_url(key: str) -> str:
+    return f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+
+
+async def _presign_upload(key: str, req: PresignInput) -> PresignOutput:
+    """Issue URLs that let the client PUT the object straight to S3."""
+    s3 = await providers.aget("s3")
+    if req.size <= PRESIGN_MULTIPART_THRESHOLD:
+        url = s3.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": S3_BUCKET_NAME, "Key": key, "ContentType": req.content_type, "ACL": "public-read"},
+            ExpiresIn=PRESIGN_EXPIRES,
+        )
+        return PresignOutput(key=key, url=url, headers={"Content-Type": req.content_type, "x-amz-acl": "public-read"})
+    with metrics.upstream("s3", "create_multipart_upload"):
+        mpu = await asyncio.to_thread(
+            s3.create_multipart_upload,
+            Bucket=S3_BUCKET_NAME,
+            Key=key,
+            ContentType=req.content_type,
+            ACL="public-read",
+        )
+    # grow parts (in whole MiB) so the upload never needs more than S3_MAX_PARTS
+    mib = 1024 ** 2
+    part_size = max(s3_stream.S3_PART_SIZE, -(-req.size // (S3_MAX_PARTS * mib)) * mib)
+    count = -(-req.size // part_size)
+
+    def sign_parts() -> List[PresignedPart]:
+        return [
+            PresignedPart(
+                part_number=n,
+                url=s3.generate_presigned_url(
+                    "upload_part",
+                    Params={"Bucket": S3_BUCKET_NAME, "Key": key, "UploadId": mpu["UploadId"], "PartNumber": n},
+                    ExpiresIn=PRESIGN_EXPIRES,
+                ),
+            )
+            for n in range(1, count + 1)
+        ]
+
+    parts = await asyncio.to_thread(sign_parts)
+    return PresignOutput(key=key, upload_id=mpu["UploadId"], part_size=part_size, parts=parts)
+
+
+async def _complete_upload(data: UploadCompleteInput, prefix: str) -> str:
+    """Finish a direct upload and check that the object landed; returns its URL."""
+    if not data.key.startswith(prefix):
+        raise HTTPException(status_code=403, detail="Key does not belong to this upload flow")
+    s3 = await providers.aget("s3")
+    try:
+        if data.upload_id:
+            with metrics.upstream("s3", "complete_multipart_upload"):
+                await asyncio.to_thread(
+                    s3.complete_multipart_upload,
+                    Bucket=S3_BUCKET_NAME,
+                    Key=data.key,
+                    UploadId=data.upload_id,
+                    MultipartUpload={"Parts": [
+                        {"PartNumber": p.part_number, "ETag": p.etag}
+                        for p in sorted(data.parts, key=lambda p: p.part_number)
+                    ]},
+                )
+        with metrics.upstream("s3", "head_object"):
+            await asyncio.to_thread(s3.head_object, Bucket=S3_BUCKET_NAME, Key=data.key)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Upload not completed: {str(e)}")
+    return _public_url(data.key)
+
+
+async def _abort_upload(data: UploadAbortInput, prefix: str) -> None:
+    """Drop the parts of a multipart upload the client gave up on."""
+    if not data.key.startswith(prefix):
+        raise HTTPException(status_code=403, detail="Key does not belong to this upload flow")
+    s3 = await providers.aget("s3")
+    try:
+        with metrics.upstream("s3", "abort_multipart_upload"):
+            await asyncio.to_thread(
+                s3.abort_multipart_upload,
+                Bucket=S3_BUCKET_NAME,
+                Key=data.key,
+                UploadId=data.upload_id,
+            )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Upload not aborted: {str(e)}")
+
+
+@app.post("/upload-model/presign", response_model=PresignOutput)
+async def presign_model_upload(req: PresignInput, current_user: str = Depends(get_current_user)):
+    """Start a direct-to-S3 model upload; finish it with /upload-model/complete."""
+    return await _presign_upload(f"models/{current_user}/{uuid.uuid4()}_{req.filename}", req)
+
+
+@app.post("/upload-model/complete")
+async def complete_model_upload(data: UploadCompleteInput, current_user: str = Depends(get_current_user)):
+    url = await _complete_upload(data, f"models/{current_user}/")
+    name = data.key.rsplit("/", 1)[-1].split("_", 1)[-1]
+    await shared_state.append("models", current_user, {"id": uuid.uuid4().hex, "name": name, "url": url})
+    await touch_collection("models", current_user)
     return {"url": url}
 
 
+@app.post("/upload-model/abort", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_model_upload(data: UploadAbortInput, current_user: str = Depends(get_current_user)):
+    await _abort_upload(data, f"models/{current_user}/")
+
+
 @app.get("/models")
-async def list_models(current_user: str = Depends(get_current_user)):
-    return USER_MODELS.get(current_user, [])
+async def list_models(request: Request, response: Response, current_user: str = Depends(get_current_user)):
+    headers = await collection_headers("models", current_user)
+    if not_modified(request, headers):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return await shared_state.get_list("models", current_user)
+
+ad_copy_cache = TieredCache(
+    "adcopy",
+    max_entries=AD_COPY_CACHE_SIZE,
+    ttl=AD_COPY_CACHE_TTL,
+    redis_url=AD_COPY_CACHE_URL or None,
+)
 
-@app.post("/api/v1/generate/ad_copy", response_model=AdCopyOutput)
-async def generate_ad_copy(input: AdCopyInput):
-    prompt_parts = [
-        "You are an expert social media advertiser.",
-        f"Generate {input.num_variations} unique ad copy variations for a product:",
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+def ad_copy_cache_key(input: AdCopyInput) -> str:
+    """Hash of the fields that shape the prompt, plus model and temperature."""
+    keywords = sorted({_normalize(k).casefold() for k in input.target_audience_keywords or []} - {""})
+    raw = json.dumps({
+        "product_name": _normalize(input.product_name),
+        "product_description": _normalize(input.product_description),
+        "target_audience_keywords": keywords,
+        "marketing_goal": _normalize(input.marketing_goal).casefold(),
+        "ad_tone": _normalize(input.ad_tone).casefold(),
+        "num_variations": input.num_variations,
+        "model": AD_COPY_MODEL,
+        "temperature": AD_COPY_TEMPERATURE,
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _product_lines(input: AdCopyInput) -> List[str]:
+    lines = [
         f"Product Name: {input.product_name}",
         f"Product Description: {input.product_description}",
     ]
     if input.target_audience_keywords:
-        prompt_parts.append(f"Target Audience Keywords: {', '.join(input.target_audience_keywords)}")
+        lines.append(f"Target Audience Keywords: {', '.join(input.target_audience_keywords)}")
     if input.marketing_goal:
-        prompt_parts.append(f"Marketing Goal: {input.marketing_goal}")
+        lines.append(f"Marketing Goal: {input.marketing_goal}")
     if input.ad_tone:
-        prompt_parts.append(f"Ad Tone: {input.ad_tone}")
-    prompt_parts.append(
-        "\nFor each variation, provide a concise headline (under 10 words), "
-        "engaging body copy (under 50 words), and a clear Call to Action (CTA).\n"
-        "Format the output strictly as a JSON array of objects with 'headline', 'body', and 'cta'."
+        lines.append(f"Ad Tone: {input.ad_tone}")
+    return lines
+
+AD_COPY_FORMAT = (
+    "For each variation, provide a concise headline (under 10 words), "
+    "engaging body copy (under 50 words), and a clear Call to Action (CTA)."
+)
+
+def ad_copy_prompt(input: AdCopyInput) -> str:
+    return "\n".join([
+        "You are an expert social media advertiser.",
+        f"Generate {input.num_variations} unique ad copy variations for a product:",
+        *_product_lines(input),
+        "\n" + AD_COPY_FORMAT,
+        "Format the output strictly as a JSON array of objects with 'headline', 'body', and 'cta'.",
+    ])
+
+def packed_ad_copy_prompt(inputs: List[AdCopyInput]) -> str:
+    parts = ["You are an expert social media advertiser.", "Generate ad copy for each of these products:"]
+    for i, item in enumerate(inputs):
+        parts += [f"\nProduct {i}:", f"Number of variations: {item.num_variations}", *_product_lines(item)]
+    parts += [
+        "\n" + AD_COPY_FORMAT,
+        "Format the output strictly as a JSON array with one object per product, in order, "
+        "each with 'product' (its number) and 'ad_copies' (an array of objects with 'headline', 'body', and 'cta').",
+    ]
+    return "\n".join(parts)
+
+def _extract_json(text: str):
+    json_match = re.search(r"```json\n(.*)\n```", text, re.DOTALL)
+    return json.loads(json_match.group(1) if json_match else text.strip())
+
+def _validate_copies(items: list) -> List[dict]:
+    # validate before caching so a malformed reply is never served again
+    return [GeneratedAdCopy(**item).model_dump() for item in items]
+
+async def _call_gemini(prompt: str) -> str:
+    model = await providers.aget("ad_copy_model")
+    with metrics.upstream("gemini", "generate_content"):
+        response = await model.generate_content_async(prompt, generation_config=ad_copy_generation_config)
+    return response.candidates[0].content.parts[0].text
+
+async def _generate_ad_copies(input: AdCopyInput) -> List[dict]:
+    return _validate_copies(_extract_json(await _call_gemini(ad_copy_prompt(input))))
+
+async def generate_ad_copy_cached(input: AdCopyInput):
+    return await ad_copy_cache.get_or_load(
+        ad_copy_cache_key(input),
+        lambda: _generate_ad_copies(input),
+        refresh=input.fresh,
     )
-    full_prompt = "\n".join(prompt_parts)
 
+@app.post("/api/v1/generate/ad_copy", response_model=AdCopyOutput)
+async def generate_ad_copy(input: AdCopyInput):
     try:
-        model = genai.GenerativeModel('gemini-pro')
-        response = await model.generate_content_async(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                candidate_count=1
-            )
-        )
-        gemini_text_output = response.candidates[0].content.parts[0].text
-
-        import json
-        import re
-        json_match = re.search(r"```json\n(.*)\n```", gemini_text_output, re.DOTALL)
-        json_string = json_match.group(1) if json_match else gemini_text_output.strip()
-        generated_data = json.loads(json_string)
-        return AdCopyOutput(ad_copies=generated_data)
+        ad_copies, cached = await generate_ad_copy_cached(input)
+        return AdCopyOutput(ad_copies=ad_copies, cached=cached)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ad copy generation error: {str(e)}")
 
-@app.post("/api/v1/generate/image", response_model=ImageOutput)
-async def generate_image(input: ImageInput):
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/v1/generate/ad_copy/stream")
+async def generate_ad_copy_stream(input: AdCopyInput):
+    """Server-sent events: one ``variation`` per ad copy as soon as it parses, then ``done``."""
+
+    async def events():
+        key = ad_copy_cache_key(input)
+        cached = None if input.fresh else await ad_copy_cache.get(key)
+        if cached is not None:
+            for item in cached:
+                yield _sse("variation", item)
+            yield _sse("done", {"count": len(cached), "cached": True})
+            return
+        copies = []
+        try:
+            model = await providers.aget("ad_copy_model")
+            with metrics.upstream("gemini", "generate_content_stream"):
+                response = await model.generate_content_async(
+                    ad_copy_prompt(input),
+                    generation_config=ad_copy_generation_config,
+                    stream=True,
+                )
+                parser = ArrayItemParser()
+                async for chunk in response:
+                    for item in parser.feed(chunk.text):
+                        copy = GeneratedAdCopy(**item).model_dump()
+                        copies.append(copy)
+                        yield _sse("variation", copy)
+            if not parser.done:
+                raise ValueError("Gemini reply ended before the JSON array was closed")
+        except Exception as e:
+            yield _sse("error", {"detail": f"Ad copy generation error: {str(e)}"})
+            return
+        await ad_copy_cache.set(key, copies)
+        yield _sse("done", {"count": len(copies), "cached": False})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _batch_single(index: int, input: AdCopyInput, slots: asyncio.Semaphore) -> List[AdCopyBatchResult]:
+    async with slots:
+        try:
+            ad_copies, cached = await generate_ad_copy_cached(input)
+            return [AdCopyBatchResult(index=index, ad_copies=ad_copies, cached=cached)]
+        except Exception as e:
+            return [AdCopyBatchResult(index=index, error=str(e))]
+
+async def _batch_packed(indexed: List[tuple], slots: asyncio.Semaphore) -> List[AdCopyBatchResult]:
+    """Generate copy for several products with one Gemini call; fills the cache per product."""
+    inputs = [item for _, item in indexed]
+    async with slots:
+        try:
+            reply = _extract_json(await _call_gemini(packed_ad_copy_prompt(inputs)))
+            if not isinstance(reply, list):
+                raise ValueError(f"packed reply is a {type(reply).__name__}, not a JSON array")
+            by_product = {}
+            for entry in reply:
+                try:
+                    by_product[int(entry["product"])] = entry.get("ad_copies")
+                except (TypeError, KeyError, ValueError):
+                    # models sometimes number products as strings; anything else is unusable
+                    continue
+        except Exception as e:
+            return [AdCopyBatchResult(index=index, error=str(e)) for index, _ in indexed]
+    results = []
+    for i, (index, item) in enumerate(indexed):
+        try:
+            if by_product.get(i) is None:
+                raise ValueError("product missing from packed reply")
+            ad_copies = _validate_copies(by_product[i])
+        except Exception as e:
+            results.append(AdCopyBatchResult(index=index, error=str(e)))
+            continue
+        await ad_copy_cache.set(ad_copy_cache_key(item), ad_copies)
+        results.append(AdCopyBatchResult(index=index, ad_copies=ad_copies))
+    return results
+
+async def _batch_jobs(data: AdCopyBatchInput, slots: asyncio.Semaphore) -> list:
+    if not data.pack:
+        return [_batch_single(i, item, slots) for i, item in enumerate(data.items)]
+    jobs = []
+    to_pack = []
+    for i, item in enumerate(data.items):
+        cached = None if item.fresh else await ad_copy_cache.get(ad_copy_cache_key(item))
+        if cached is not None:
+            jobs.append(asyncio.sleep(0, [AdCopyBatchResult(index=i, ad_copies=cached, cached=True)]))
+        else:
+            to_pack.append((i, item))
+    for start in range(0, len(to_pack), AD_COPY_PACK_SIZE):
+        jobs.append(_batch_packed(to_pack[start:start + AD_COPY_PACK_SIZE], slots))
+    return jobs
+
+@app.post("/api/v1/generate/ad_copy/batch")
+async def generate_ad_copy_batch(data: AdCopyBatchInput):
+    """Stream one ``AdCopyBatchResult`` per input as NDJSON, in completion order."""
+    if len(data.items) > AD_COPY_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {AD_COPY_BATCH_MAX_ITEMS} items per batch")
+    slots = asyncio.Semaphore(AD_COPY_BATCH_CONCURRENCY)
+    jobs = await _batch_jobs(data, slots)
+
+    async def lines():
+        tasks = [asyncio.ensure_future(job) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for result in await next_done:
+                    yield result.model_dump_json(exclude_none=True) + "\n"
+        finally:
+            # client went away: stop spending upstream quota
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/health/ad-copy-cache")
+async def ad_copy_cache_stats() -> dict:
+    return ad_copy_cache.stats()
+
+DALLE_SIZES = {
+    "1:1": "1024x1024",
+    "16:9": "1792x1024",
+    "9:16": "1024x1792",
+    "4:3": "1792x1024",
+    "3:2": "1792x1024",
+}
+
+def _dalle_prompt(input: ImageInput) -> str:
     dalle_prompt = input.prompt
     if input.style:
         dalle_prompt += f", in a {input.style} style"
     if input.branding_elements:
         dalle_prompt += f", with {', '.join(input.branding_elements)}"
-    size_map = {
-        "1:1": "1024x1024",
-        "16:9": "1792x1024",
-        "9:16": "1024x1792",
-        "4:3": "1792x1024",
-        "3:2": "1792x1024",
-    }
-    dalle_size = size_map.get(input.aspect_ratio, "1024x1024")
+    return dalle_prompt
+
+async def _generate_image_to_s3(input: ImageInput) -> str:
+    dalle_size = DALLE_SIZES.get(input.aspect_ratio, "1024x1024")
+    resp = await safe_dalle(_dalle_prompt(input), dalle_size, input.quality)
+    url = resp.data[0].url
+    key = f"generated_ads/{uuid.uuid4()}.png"
+    logger.info("Streaming %s to S3 as %s", url, key)
+    await s3_stream.copy_url_to_s3(http_pool.get_client(), url, await providers.aget("s3"), S3_BUCKET_NAME, key, "image/png")
+    return _public_url(key)
+
+@app.post("/api/v1/generate/image", response_model=ImageOutput)
+async def generate_image(input: ImageInput):
     try:
-        resp = await safe_dalle(dalle_prompt, dalle_size, input.quality)
-        url = resp.data[0].url
-        img_resp = await safe_get(url)
-        image_bytes = io.BytesIO(img_resp.content)
-        key = f"generated_ads/{uuid.uuid4()}.png"
-        await safe_s3_upload(image_bytes, key, "image/png")
-        return ImageOutput(
-            image_url=f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
-        )
+        return ImageOutput(image_url=await _generate_image_to_s3(input))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image generation error: {str(e)}")
 
+@app.post("/api/v1/generate/image/variations", response_model=ImageVariationsOutput)
+async def generate_image_variations(input: ImageVariationsInput):
+    """Generate ``n`` images concurrently; each is uploaded while the rest are still generating."""
+    if input.n > IMAGE_VARIATIONS_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {IMAGE_VARIATIONS_MAX} variations per request")
+    tasks = [asyncio.ensure_future(_generate_image_to_s3(input)) for _ in range(input.n)]
+    urls, errors = [], []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                urls.append(await next_done)
+            except Exception as e:
+                logger.warning(f"Image variation failed: {e}")
+                errors.append(str(e))
+    finally:
+        for task in tasks:
+            task.cancel()
+    if not urls:
+        raise HTTPException(status_code=500, detail=f"Image generation error: {errors[0]}")
+    return ImageVariationsOutput(image_urls=urls, errors=errors)
+
 
 @app.post("/api/v1/upload", response_model=ImageOutput)
 async def upload_file(file: UploadFile = File(...)):
     """Upload a user provided file to S3 and return a public URL."""
     key = f"uploads/{uuid.uuid4()}_{file.filename}"
     try:
-        await safe_s3_upload(file.file, key, file.content_type or "application/octet-stream")
+        await s3_stream.upload_file(file, await providers.aget("s3"), S3_BUCKET_NAME, key, file.content_type or "application/octet-stream")
         return ImageOutput(image_url=f"https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+@app.post("/api/v1/upload/presign", response_model=PresignOutput)
+async def presign_upload(req: PresignInput):
+    """Start a direct-to-S3 upload; finish it with /api/v1/upload/complete."""
+    try:
+        return await _presign_upload(f"uploads/{uuid.uuid4()}_{req.filename}", req)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+@app.post("/api/v1/upload/complete", response_model=ImageOutput)
+async def complete_upload(data: UploadCompleteInput):
+    return ImageOutput(image_url=await _complete_upload(data, "uploads/"))
+
+
+@app.post("/api/v1/upload/abort", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(data: UploadAbortInput):
+    await _abort_upload(data, "uploads/")
+
+
 @app.post("/api/v1/generate/video", response_model=TaskStatus)
 async def generate_video(input: VideoInput):
-    task = celery_app.send_task("generate_video_task", args=[input.dict()])
-    return TaskStatus(task_id=task.id)
+    payload = input.dict()
+    if input.no_cache:
+        task = celery_app.send_task("generate_video_task", args=[payload])
+        return TaskStatus(task_id=task.id)
+    digest = render_cache.input_hash(payload)
+    task_id = str(uuid.uuid4())
+    existing = await asyncio.to_thread(render_cache.claim_inflight, digest, task_id)
+    if existing:
+        logger.info("Coalescing video request onto in-flight task %s", existing)
+        return TaskStatus(task_id=existing)
+    try:
+        celery_app.send_task("generate_video_task", args=[payload], task_id=task_id)
+    except Exception:
+        await asyncio.to_thread(render_cache.release_inflight, digest, task_id)
+        raise
+    return TaskStatus(task_id=task_id)
 
 
 # --- Meta Ads API Endpoints ---
@@ -344,80 +874,87 @@ async def meta_auth_start(user_id: str):
 async def meta_oauth_callback(code: str, state: str):
     if not META_APP_ID or not META_APP_SECRET or not META_REDIRECT_URI:
         raise HTTPException(status_code=500, detail="Meta app not configured")
-    async with httpx.AsyncClient(timeout=10) as client:
-        token_resp = await client.get(
-            "https://graph.facebook.com/v18.0/oauth/access_token",
-            params={
-                "client_id": META_APP_ID,
-                "client_secret": META_APP_SECRET,
-                "redirect_uri": META_REDIRECT_URI,
-                "code": code,
-            },
-        )
-        token_resp.raise_for_status()
-        access = token_resp.json().get("access_token")
-        ll_resp = await client.get(
-            "https://graph.facebook.com/v18.0/oauth/access_token",
-            params={
-                "grant_type": "fb_exchange_token",
-                "client_id": META_APP_ID,
-                "client_secret": META_APP_SECRET,
-                "fb_exchange_token": access,
-            },
-        )
-        ll_resp.raise_for_status()
-        token = ll_resp.json().get("access_token")
-        me_resp = await client.get(
-            "https://graph.facebook.com/v18.0/me",
-            params={"access_token": token},
-        )
-        me_resp.raise_for_status()
-        user_id_fb = me_resp.json().get("id")
-    TOKEN_STORE[state] = token
-    TOKEN_STORE[state + "_fbid"] = user_id_fb
+    client = http_pool.get_client()
+    token_resp = await client.get(
+        "https://graph.facebook.com/v18.0/oauth/access_token",
+        params={
+            "client_id": META_APP_ID,
+            "client_secret": META_APP_SECRET,
+            "redirect_uri": META_REDIRECT_URI,
+            "code": code,
+        },
+    )
+    token_resp.raise_for_status()
+    access = token_resp.json().get("access_token")
+    ll_resp = await client.get(
+        "https://graph.facebook.com/v18.0/oauth/access_token",
+        params={
+            "grant_type": "fb_exchange_token",
+            "client_id": META_APP_ID,
+            "client_secret": META_APP_SECRET,
+            "fb_exchange_token": access,
+        },
+    )
+    ll_resp.raise_for_status()
+    token = ll_resp.json().get("access_token")
+    me_resp = await client.get(
+        "https://graph.facebook.com/v18.0/me",
+        params={"access_token": token},
+    )
+    me_resp.raise_for_status()
+    user_id_fb = me_resp.json().get("id")
+    await shared_state.set("meta_tokens", state, token)
+    await shared_state.set("meta_user_ids", state, user_id_fb)
+    await touch_collection("meta", state)
     return {"meta_user_id": user_id_fb}
 
 
 @app.get("/meta-status")
-async def meta_status(current_user: str = Depends(get_current_user)):
-    return {"linked": current_user in TOKEN_STORE}
+async def meta_status(request: Request, response: Response, current_user: str = Depends(get_current_user)):
+    headers = await collection_headers("meta", current_user)
+    if not_modified(request, headers):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return {"linked": await shared_state.get("meta_tokens", current_user) is not None}
 
 
 @app.post("/api/v1/platforms/meta/upload/image")
 async def meta_upload_image(user_id: str, ad_account_id: str, image_url: str):
-    token = TOKEN_STORE.get(user_id)
+    token = await shared_state.get("meta_tokens", user_id)
     if not token:
         raise HTTPException(status_code=400, detail="User not authorized")
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(image_url)
-        resp.raise_for_status()
+    resp = await http_pool.get_client().get(image_url)
+    resp.raise_for_status()
+    fb = await providers.aget("facebook")
     with NamedTemporaryFile(delete=False, suffix=".png") as tmp:
         tmp.write(resp.content)
         tmp.flush()
-        FacebookAdsApi.init(access_token=token)
-        ad_image = AdImage(parent_id=ad_account_id)
-        ad_image[AdImage.Field.filename] = tmp.name
-        ad_image.remote_create()
+        fb.FacebookAdsApi.init(access_token=token)
+        ad_image = fb.AdImage(parent_id=ad_account_id)
+        ad_image[fb.AdImage.Field.filename] = tmp.name
+        with metrics.upstream("graph", "create_ad_image"):
+            ad_image.remote_create()
     os.unlink(tmp.name)
-    return {"image_hash": ad_image[AdImage.Field.hash]}
+    return {"image_hash": ad_image[fb.AdImage.Field.hash]}
 
 
 @app.post("/api/v1/platforms/meta/upload/video")
 async def meta_upload_video(user_id: str, ad_account_id: str, video_url: str):
-    token = TOKEN_STORE.get(user_id)
+    token = await shared_state.get("meta_tokens", user_id)
     if not token:
         raise HTTPException(status_code=400, detail="User not authorized")
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(video_url)
-        resp.raise_for_status()
+    resp = await http_pool.get_client().get(video_url)
+    resp.raise_for_status()
+    fb = await providers.aget("facebook")
     with NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
         tmp.write(resp.content)
         tmp.flush()
-        FacebookAdsApi.init(access_token=token)
-        video = AdVideo(parent_id=ad_account_id)
-        video[AdVideo.Field.filename] = tmp.name
-        video.remote_create()
-        status_url = video[AdVideo.Field.id]
+        fb.FacebookAdsApi.init(access_token=token)
+        video = fb.AdVideo(parent_id=ad_account_id)
+        video[fb.AdVideo.Field.filename] = tmp.name
+        with metrics.upstream("graph", "create_ad_video"):
+            video.remote_create()
+        status_url = video[fb.AdVideo.Field.id]
     os.unlink(tmp.name)
     return {"video_id": status_url}
 
@@ -439,9 +976,8 @@ class MetaAdInput(BaseModel):
     daily_budget: int = 1000
     objective: str = "LINK_CLICKS"
 
-class CampaignConfigInput(BaseModel):
-    """Configuration for publishing a Meta ad with optional scheduling."""
-    user_id: str
+class MetaPublishItem(BaseModel):
+    """One ad to publish; ads with equal account, campaign and ad set fields share them."""
     ad_account_id: str
     page_id: str
     headline: str
@@ -459,6 +995,14 @@ class CampaignConfigInput(BaseModel):
     adset_id: Optional[str] = None
     adset_name: Optional[str] = None
 
+class CampaignConfigInput(MetaPublishItem):
+    """Configuration for publishing a Meta ad with optional scheduling."""
+    user_id: str
+
+class BulkPublishInput(BaseModel):
+    user_id: str
+    items: List[MetaPublishItem] = Field(..., min_length=1)
+
 
 @app.post("/api/v1/platforms/meta/create_ad", response_model=TaskStatus)
 async def meta_create_ad(input: MetaAdInput):
@@ -469,7 +1013,7 @@ async def meta_create_ad(input: MetaAdInput):
 @app.post("/api/v1/platforms/meta/publish_ad", response_model=TaskStatus)
 async def meta_publish_ad(cfg: CampaignConfigInput):
     """Publish an ad to Meta with optional scheduling."""
-    token = TOKEN_STORE.get(cfg.user_id)
+    token = await shared_state.get("meta_tokens", cfg.user_id)
     if not token:
         raise HTTPException(status_code=400, detail="User not authorized")
     payload = cfg.dict()
@@ -478,8 +1022,21 @@ async def meta_publish_ad(cfg: CampaignConfigInput):
     return TaskStatus(task_id=task.id)
 
 
-@app.get("/api/v1/tasks/{task_id}")
-async def get_task(task_id: str):
+@app.post("/api/v1/platforms/meta/publish_ads", response_model=TaskStatus)
+async def meta_bulk_publish_ads(data: BulkPublishInput):
+    """Publish many ads in one task; its result reports the status of each item."""
+    if len(data.items) > META_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {META_BULK_MAX_ITEMS} ads per bulk publish")
+    token = await shared_state.get("meta_tokens", data.user_id)
+    if not token:
+        raise HTTPException(status_code=400, detail="User not authorized")
+    payload = data.dict()
+    payload["access_token"] = token
+    task = celery_app.send_task("bulk_publish_meta_ads_task", args=[payload])
+    return TaskStatus(task_id=task.id)
+
+
+def _task_status(task_id: str) -> dict:
     res = celery_app.AsyncResult(task_id)
     if res.state == "PENDING":
         return {"status": "pending"}
@@ -489,48 +1046,96 @@ async def get_task(task_id: str):
         return {"status": "success", "result": res.result}
     return {"status": res.state.lower()}
 
-# --- Saved Ad Endpoints (in-memory demo) ---
+def _status_from_event(event: dict) -> dict:
+    if event.get("status") == "success":
+        return {"status": "success", "result": event.get("result"), "progress": event}
+    if event.get("status") == "failure":
+        return {"status": "failure", "detail": event.get("detail"), "progress": event}
+    return {"status": "started", "progress": event}
+
+@app.get("/api/v1/tasks/{task_id}")
+async def get_task(task_id: str):
+    # the worker's latest progress event answers most polls with one Redis GET
+    event = await task_progress.latest(task_id)
+    if event:
+        return _status_from_event(event)
+    return _task_status(task_id)
+
+@app.get("/api/v1/tasks/{task_id}/events")
+async def task_events(task_id: str):
+    """Server-sent ``progress`` events until the task finishes, then one ``done`` event."""
+
+    async def stream():
+        async for event in task_progress.events(task_id):
+            if event is None:
+                # no news for a while: make sure the task did not finish without an event
+                status = _task_status(task_id)
+                if status["status"] in ("success", "failure"):
+                    yield _sse("done", status)
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            if event.get("final"):
+                yield _sse("done", _status_from_event(event))
+                return
+            yield _sse("progress", event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Saved Ad Endpoints ---
 
 @app.post("/ads/save", response_model=SavedAdDisplay)
 async def save_ad_endpoint(ad_data: SavedAdCreate, current_user: str = Depends(get_current_user)):
-    global _next_ad_id
-    new_ad = ad_data.dict()
-    new_ad["id"] = _next_ad_id
-    new_ad["user_id"] = current_user
-    new_ad["created_at"] = datetime.utcnow()
-    _next_ad_id += 1
-    USER_SAVED_ADS.setdefault(current_user, []).append(new_ad)
-    return SavedAdDisplay(**new_ad)
+    ad = await saved_ads.create(current_user, ad_data.model_dump())
+    return SavedAdDisplay(**ad)
 
 
 @app.get("/ads/my-ads", response_model=List[SavedAdDisplay])
-async def get_my_ads_endpoint(current_user: str = Depends(get_current_user)):
-    return USER_SAVED_ADS.get(current_user, [])
+async def get_my_ads_endpoint(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    current_user: str = Depends(get_current_user),
+):
+    """One page of the user's ads by ``created_at``; ``X-Next-Cursor`` points at the next page."""
+    # every page has its own tag; a 304 means the client's copy, cursor included, is current
+    headers = await collection_headers("ads", current_user, f"{limit}:{cursor or ''}:{order}")
+    if not_modified(request, headers):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    try:
+        ads, next_cursor = await saved_ads.list(current_user, limit, cursor, descending=order == "desc")
+    except ads_store.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return ads
 
 
 @app.get("/ads/{ad_id}", response_model=SavedAdDisplay)
 async def get_saved_ad_endpoint(ad_id: int, current_user: str = Depends(get_current_user)):
-    for ad in USER_SAVED_ADS.get(current_user, []):
-        if ad["id"] == ad_id:
-            return SavedAdDisplay(**ad)
-    raise HTTPException(status_code=404, detail="Ad not found or access denied")
+    ad = await saved_ads.get(current_user, ad_id)
+    if ad is None:
+        raise HTTPException(status_code=404, detail="Ad not found or access denied")
+    return SavedAdDisplay(**ad)
 
 
 @app.put("/ads/{ad_id}", response_model=SavedAdDisplay)
 async def update_ad_endpoint(ad_id: int, ad_data: SavedAdCreate, current_user: str = Depends(get_current_user)):
-    for i, ad in enumerate(USER_SAVED_ADS.get(current_user, [])):
-        if ad["id"] == ad_id:
-            updated_ad = ad.copy()
-            updated_ad.update(ad_data.dict(exclude_unset=True))
-            USER_SAVED_ADS[current_user][i] = updated_ad
-            return SavedAdDisplay(**updated_ad)
-    raise HTTPException(status_code=404, detail="Ad not found or access denied")
+    ad = await saved_ads.update(current_user, ad_id, ad_data.model_dump(exclude_unset=True))
+    if ad is None:
+        raise HTTPException(status_code=404, detail="Ad not found or access denied")
+    return SavedAdDisplay(**ad)
 
 
 @app.delete("/ads/{ad_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_saved_ad_endpoint(ad_id: int, current_user: str = Depends(get_current_user)):
-    initial_len = len(USER_SAVED_ADS.get(current_user, []))
-    USER_SAVED_ADS[current_user] = [ad for ad in USER_SAVED_ADS.get(current_user, []) if ad["id"] != ad_id]
-    if len(USER_SAVED_ADS.get(current_user, [])) == initial_len:
+    if not await saved_ads.delete(current_user, ad_id):
         raise HTTPException(status_code=404, detail="Ad not found or access denied")
     return
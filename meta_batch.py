@@ -0,0 +1,206 @@
+"""Graph API batch requests for chains of Marketing API calls.
+
+Creating an ad takes up to four dependent objects (campaign, ad set,
+creative, ad). Sent one by one they cost a full Graph round trip each;
+``GraphBatch`` submits the whole chain as a single ``POST /?batch=...``.
+Later steps point at earlier results with ``{result=<step>:$.id}``
+references, which Graph resolves server-side.
+
+Graph answers a batch with one entry per step. A failed step carries an
+``error`` object; steps that depended on it come back empty. Both are
+mapped onto ``GraphStepError`` keyed by step name, so callers can tell
+which object was not created and which ones already exist.
+"""
+
+import os
+import re
+import json
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import http_pool
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# point at scripts/fake_graph.py to exercise publishing without a Meta account
+META_GRAPH_URL = os.getenv("META_GRAPH_URL", "https://graph.facebook.com").rstrip("/")
+META_GRAPH_VERSION = os.getenv("META_GRAPH_VERSION", "v18.0")
+# a batch runs every step on Graph's side before replying
+META_BATCH_TIMEOUT = float(os.getenv("META_BATCH_TIMEOUT", "60"))
+# Graph rejects batches with more steps than this
+MAX_BATCH_SIZE = 50
+# batches of one execute_grouped call in flight at once
+META_BATCH_CONCURRENCY = int(os.getenv("META_BATCH_CONCURRENCY", "4"))
+
+_REFERENCE = re.compile(r"(\{result=[^}]+\})")
+
+
+class GraphError(Exception):
+    """An ``error`` object returned by Graph."""
+
+    def __init__(self, message: str, code: Optional[int] = None, error: Optional[dict] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.error = error or {}
+
+    @classmethod
+    def from_body(cls, body: dict, status: Optional[int] = None, **kwargs) -> "GraphError":
+        error = body.get("error") or {}
+        return cls(error.get("message") or f"Graph request failed with HTTP {status}", error.get("code", status), error, **kwargs)
+
+
+class GraphStepError(GraphError):
+    """A batch step that failed, or was skipped because a step it references failed."""
+
+    def __init__(self, message: str, code: Optional[int] = None, error: Optional[dict] = None, step: str = "", skipped: bool = False):
+        super().__init__(message, code, error)
+        self.step = step
+        self.skipped = skipped
+        # bodies of the steps in the same batch that did succeed
+        self.created: Dict[str, dict] = {}
+
+    def __str__(self) -> str:
+        text = f"{self.step}: {self.message}"
+        if self.code is not None:
+            text += f" (code {self.code})"
+        if self.created:
+            text += "; already created: " + ", ".join(f"{name}={body.get('id')}" for name, body in self.created.items())
+        return text
+
+
+def reference(step: str, path: str = "$.id") -> str:
+    """Placeholder that Graph replaces with ``path`` of ``step``'s result."""
+    return f"{{result={step}:{path}}}"
+
+
+def _encode(value: Any) -> str:
+    """Percent-encode a parameter but leave result references readable to Graph."""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    parts = _REFERENCE.split(str(value))
+    return "".join(part if i % 2 else quote(part, safe="") for i, part in enumerate(parts))
+
+
+def _url(path: str = "") -> str:
+    return f"{META_GRAPH_URL}/{META_GRAPH_VERSION}/{path}"
+
+
+async def post(path: str, params: dict, access_token: str, client=None) -> dict:
+    """A single Graph POST outside a batch, e.g. an asset upload; raises ``GraphError``."""
+    client = client or http_pool.get_client()
+    with metrics.upstream("graph", path.rsplit("/", 1)[-1]):
+        resp = await client.post(_url(path), data={**params, "access_token": access_token}, timeout=META_BATCH_TIMEOUT)
+    try:
+        body = resp.json()
+    except ValueError:
+        body = {}
+    if resp.status_code >= 400 or "error" in body:
+        raise GraphError.from_body(body, resp.status_code)
+    return body
+
+
+class GraphBatch:
+    """Steps to send as one Graph batch, in order."""
+
+    def __init__(self):
+        self.steps: List[dict] = []
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def add(self, name: str, method: str, path: str, params: Optional[dict] = None) -> str:
+        """Queue a call to ``path`` (relative to the API version); returns a reference to its id."""
+        if any(step["name"] == name for step in self.steps):
+            raise ValueError(f"Duplicate batch step {name!r}")
+        step = {"name": name, "method": method, "relative_url": path, "omit_response_on_success": False}
+        body = "&".join(f"{key}={_encode(value)}" for key, value in (params or {}).items() if value is not None)
+        if body:
+            step["body"] = body
+        self.steps.append(step)
+        return reference(name)
+
+    async def execute_all(self, access_token: str, client=None) -> Tuple[Dict[str, dict], Dict[str, GraphStepError]]:
+        """Send the batch; returns the bodies of the steps that succeeded and the errors of the rest."""
+        if not self.steps:
+            return {}, {}
+        if len(self.steps) > MAX_BATCH_SIZE:
+            raise ValueError(f"A Graph batch holds at most {MAX_BATCH_SIZE} steps, got {len(self.steps)}")
+        client = client or http_pool.get_client()
+        with metrics.upstream("graph", "batch"):
+            resp = await client.post(
+                _url(),
+                data={"access_token": access_token, "batch": json.dumps(self.steps), "include_headers": "false"},
+                timeout=META_BATCH_TIMEOUT,
+            )
+        try:
+            reply = resp.json()
+        except ValueError:
+            reply = None
+        if resp.status_code >= 400 or not isinstance(reply, list):
+            # the batch as a whole was rejected, e.g. an expired token
+            raise GraphError.from_body(reply if isinstance(reply, dict) else {}, resp.status_code)
+
+        results: Dict[str, dict] = {}
+        errors: Dict[str, GraphStepError] = {}
+        for step, item in zip(self.steps, reply + [None] * (len(self.steps) - len(reply))):
+            name = step["name"]
+            if item is None:
+                errors[name] = GraphStepError("not run because a step it references failed", step=name, skipped=True)
+                continue
+            try:
+                body = json.loads(item.get("body") or "{}")
+            except ValueError:
+                body = {"error": {"message": f"Unparseable response: {item.get('body')!r}"}}
+            if item.get("code", 200) >= 400 or "error" in body:
+                errors[name] = GraphStepError.from_body(body, item.get("code"), step=name)
+            else:
+                results[name] = body
+        if errors:
+            logger.warning(f"[graph] Batch steps failed: {', '.join(str(e) for e in errors.values())}")
+        return results, errors
+
+    async def execute(self, access_token: str, client=None) -> Dict[str, dict]:
+        """Send the batch; raises the ``GraphStepError`` of the first failing step."""
+        results, errors = await self.execute_all(access_token, client)
+        if errors:
+            error = next(iter(errors.values()))
+            error.created = results
+            raise error
+        return results
+
+
+async def execute_grouped(access_token: str, groups: List[List[tuple]], client=None) -> Tuple[Dict[str, dict], Dict[str, Exception]]:
+    """Run ``(name, method, path, params)`` steps in as few batches as fit.
+
+    Steps of one group stay in the same batch, so they may reference each
+    other; groups must not reference steps of other groups. A batch that
+    Graph rejects as a whole fails each of its steps with the same error.
+    """
+    batches = [GraphBatch()]
+    for group in groups:
+        if len(group) > MAX_BATCH_SIZE:
+            raise ValueError(f"A step group holds at most {MAX_BATCH_SIZE} steps, got {len(group)}")
+        if len(batches[-1]) + len(group) > MAX_BATCH_SIZE:
+            batches.append(GraphBatch())
+        for step in group:
+            batches[-1].add(*step)
+    slots = asyncio.Semaphore(META_BATCH_CONCURRENCY)
+
+    async def run(batch: GraphBatch):
+        async with slots:
+            return await batch.execute_all(access_token, client)
+
+    replies = await asyncio.gather(*(run(batch) for batch in batches), return_exceptions=True)
+    results: Dict[str, dict] = {}
+    errors: Dict[str, Exception] = {}
+    for batch, reply in zip(batches, replies):
+        if isinstance(reply, Exception):
+            errors.update((step["name"], reply) for step in batch.steps)
+        else:
+            results.update(reply[0])
+            errors.update(reply[1])
+    return results, errors
@@ -0,0 +1,170 @@
+"""Prometheus metrics shared by the API and the Celery worker.
+
+The API serves them on ``/metrics``; the worker starts a sidecar HTTP server
+on ``WORKER_METRICS_PORT``. With a prefork worker pool (or several uvicorn
+workers) set ``PROMETHEUS_MULTIPROC_DIR`` to an empty writable directory so
+the samples of every process are aggregated; the prefork worker refuses to
+start its sidecar without it. Short-lived helper processes, such as segment
+renders, run with ``untracked_env()`` so they leave no files behind there.
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+import redis
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the worker's sidecar server
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9540"))
+# Celery queues whose backlog is exported as celery_queue_depth
+METRICS_QUEUES = [q for q in os.getenv("METRICS_QUEUES", "celery").split(",") if q]
+
+_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "API request latency.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "render_stage_duration_seconds",
+    "Time spent per video generation stage.",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+UPSTREAM_SECONDS = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to external services.",
+    ["upstream", "operation", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+RETRIES = Counter(
+    "upstream_retries_total",
+    "Attempts retried by tenacity.",
+    ["function"],
+)
+ENCODE_FPS = Histogram(
+    "render_encode_fps",
+    "Output frames rendered per wall-clock second.",
+    ["engine"],
+    buckets=(1, 2, 5, 10, 20, 30, 60, 120, 240, 480),
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as video generation stage ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def upstream(name: str, operation: str):
+    """Time a call to an external service, labelled by whether it raised."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        UPSTREAM_SECONDS.labels(name, operation, outcome).observe(time.perf_counter() - start)
+
+
+def record_retry(retry_state) -> None:
+    """tenacity ``before_sleep`` hook."""
+    RETRIES.labels(getattr(retry_state.fn, "__qualname__", "unknown")).inc()
+
+
+class QueueDepthCollector:
+    """Report the length of the Celery queues in Redis at scrape time."""
+
+    def __init__(self, broker_url: str, queues=METRICS_QUEUES):
+        self.client = redis.Redis.from_url(broker_url)
+        self.queues = queues
+
+    def collect(self):
+        family = GaugeMetricFamily("celery_queue_depth", "Tasks waiting in the broker.", labels=["queue"])
+        for queue in self.queues:
+            try:
+                family.add_metric([queue], self.client.llen(queue))
+            except redis.RedisError as e:
+                logger.warning(f"[metrics] Could not read length of queue {queue}: {e}")
+        yield family
+
+
+def _multiprocess() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+_extra_collectors = []
+
+
+def add_collector(collector) -> None:
+    """Expose ``collector`` (e.g. a ``QueueDepthCollector``) from this process."""
+    _extra_collectors.append(collector)
+    if not _multiprocess():
+        REGISTRY.register(collector)
+
+
+def registry() -> CollectorRegistry:
+    """Registry to expose: the default one, or an aggregate over all processes."""
+    if not _multiprocess():
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    for collector in _extra_collectors:
+        collected.register(collector)
+    return collected
+
+
+def render_latest() -> tuple:
+    """``(body, content_type)`` for a ``/metrics`` response."""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+def start_worker_server(port: int = WORKER_METRICS_PORT, forking: bool = False) -> None:
+    """Serve ``/metrics`` for the worker; ``forking`` means tasks run in child processes."""
+    if not port:
+        return
+    if forking and not _multiprocess():
+        # the server runs in the parent, which never records a task sample itself
+        raise RuntimeError(
+            "The prefork pool needs PROMETHEUS_MULTIPROC_DIR for worker metrics; "
+            "set it to an empty writable directory or set WORKER_METRICS_PORT=0"
+        )
+    start_http_server(port, registry=registry())
+    logger.info(f"Serving worker metrics on :{port}")
+
+
+def untracked_env() -> dict:
+    """Environment for short-lived helper processes whose samples are not kept.
+
+    In multiprocess mode every process writes its own files, and nothing
+    would remove those of a process that lives for one segment.
+    """
+    env = dict(os.environ)
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    return env
+
+
+def mark_process_dead(pid: int) -> None:
+    if _multiprocess():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,196 @@
+"""moviepy render engine: composites frames in Python.
+
+Also runnable as ``python -m moviepy_render PLAN_JSON OUT_MP4`` so segment
+renders can run in separate processes.
+"""
+
+import sys
+import logging
+import argparse
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+from PIL import Image
+from proglog import ProgressBarLogger
+from moviepy.editor import (
+    ImageClip,
+    ColorClip,
+    CompositeVideoClip,
+    concatenate_videoclips,
+    concatenate_audioclips,
+    AudioFileClip,
+    CompositeAudioClip,
+    VideoFileClip,  # for 3D model intro clips
+    vfx,
+)
+
+import metrics
+from render_plan import RenderPlan
+from text_raster import render_text
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=8)
+def _black_frame(width: int, height: int) -> np.ndarray:
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame.setflags(write=False)
+    return frame
+
+
+def _resize_frame(frame: np.ndarray, size: tuple) -> np.ndarray:
+    # moviepy 1.x's own resize calls Image.ANTIALIAS, which Pillow 10 removed
+    if frame.shape[1::-1] == tuple(size):
+        return frame
+    return np.asarray(Image.fromarray(frame).resize(size, Image.LANCZOS))
+
+
+def _load_still(path: str, size: tuple) -> np.ndarray:
+    with Image.open(path) as img:
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        return np.asarray(img.resize(size, Image.LANCZOS))
+
+
+def _text_clip(text: str, fontsize: int, size: tuple, duration: float) -> ImageClip:
+    # RGBA input gives the ImageClip an alpha mask
+    return ImageClip(render_text(text, fontsize=fontsize, canvas_size=size)).set_position("center").set_duration(duration)
+
+
+@lru_cache(maxsize=32)
+def _outro_frame(text: str, fontsize: int, width: int, height: int) -> np.ndarray:
+    size = (width, height)
+    txt = _text_clip(text, fontsize, size, 1)
+    frame = CompositeVideoClip([ColorClip(size=size, color=(0,0,0)).set_duration(1), txt]).get_frame(0)
+    frame.setflags(write=False)
+    return frame
+
+
+def _is_static(clip) -> bool:
+    """True when every frame of ``clip`` is identical (stills, colors, text)."""
+    if isinstance(clip, CompositeVideoClip):
+        return all(_is_static(c) for c in clip.clips)
+    return isinstance(clip, ImageClip)
+
+
+def _freeze(clip):
+    """Rasterize a static clip once so the encoder is fed one cached buffer."""
+    if not _is_static(clip):
+        return clip
+    frozen = ImageClip(clip.get_frame(0)).set_duration(clip.duration)
+    if clip.audio is not None:
+        frozen = frozen.set_audio(clip.audio)
+    return frozen
+
+
+def build_clip(plan: RenderPlan, reuse_static_frames: bool = True):
+    """Assemble the final moviepy clip for ``plan`` without encoding it."""
+    clips = []
+    audio_clips = []
+    size = (plan.width, plan.height)
+    freeze = _freeze if reuse_static_frames else (lambda clip: clip)
+
+    if plan.intro_path:
+        try:
+            model_clip = VideoFileClip(plan.intro_path).fl_image(lambda frame: _resize_frame(frame, size))
+            model_clip = model_clip.set_duration(plan.intro_duration)
+            clips.append(model_clip)
+            logger.info("3D model video successfully integrated into final ad.")
+        except Exception as e:
+            logger.error(f"[3D Render Integration Error] {e}")
+    for scene in plan.scenes:
+        if scene.image_path:
+            base = ImageClip(_load_still(scene.image_path, size)).set_duration(scene.duration)
+        else:
+            base = ColorClip(size=size, color=(0,0,0)).set_duration(scene.duration)
+        overlays = [base]
+        if scene.text:
+            txt_clip = _text_clip(scene.text, scene.text_fontsize, size, scene.duration)
+            overlays.append(txt_clip)
+        comp = freeze(CompositeVideoClip(overlays))
+        if scene.audio_path and plan.include_audio:
+            audio = AudioFileClip(scene.audio_path)
+            if scene.audio_duration is not None and scene.audio_duration < scene.duration:
+                # pad with silence, as ffmpeg's apad does, instead of reading past the end of the file
+                audio = CompositeAudioClip([audio.set_duration(scene.audio_duration)])
+            audio = audio.set_duration(scene.duration)
+            comp = comp.set_audio(audio)
+            audio_clips.append(audio)
+        clips.append(comp)
+
+    if plan.include_outro and reuse_static_frames:
+        clips.append(ImageClip(_outro_frame(plan.outro_text, plan.outro_fontsize, *size)).set_duration(plan.outro_duration))
+    elif plan.include_outro:
+        outro_clip = ColorClip(size=size, color=(0,0,0)).set_duration(plan.outro_duration)
+        outro_text_clip = _text_clip(plan.outro_text, plan.outro_fontsize, size, plan.outro_duration)
+        clips.append(CompositeVideoClip([outro_clip, outro_text_clip]))
+    # every clip is already frame-sized, so "chain" avoids a per-frame composite
+    method = "chain" if reuse_static_frames else "compose"
+    final_video = concatenate_videoclips(clips, method=method)
+    fixed_total_duration = plan.total_duration
+    if fixed_total_duration:
+        if final_video.duration > fixed_total_duration:
+            final_video = final_video.subclip(0, fixed_total_duration)
+            logger.info(f"Video trimmed to {fixed_total_duration}s.")
+        elif final_video.duration < fixed_total_duration:
+            pad_duration = fixed_total_duration - final_video.duration
+            if reuse_static_frames:
+                pad = ImageClip(_black_frame(*size)).set_duration(pad_duration)
+            else:
+                pad = ColorClip(size=size, color=(0,0,0), duration=pad_duration)
+            final_video = concatenate_videoclips([final_video, pad], method=method)
+            logger.info(f"Video extended to {fixed_total_duration}s with filler.")
+    if audio_clips:
+        final_audio = concatenate_audioclips(audio_clips)
+        if fixed_total_duration:
+            if final_audio.duration > final_video.duration:
+                final_audio = final_audio.subclip(0, final_video.duration)
+            elif final_audio.duration < final_video.duration:
+                final_audio = final_audio.fx(vfx.loop, duration=final_video.duration)
+        final_video = final_video.set_audio(final_audio)
+    return final_video
+
+
+class _PercentLogger(ProgressBarLogger):
+    """Forward moviepy's frame progress bar to a ``percent`` callback."""
+
+    def __init__(self, progress: Callable[[float], None]):
+        super().__init__()
+        self.progress = progress
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        total = self.bars[bar].get("total")
+        if bar == "t" and attr == "index" and total:
+            self.progress(100 * (value + 1) / total)
+
+
+def render(plan: RenderPlan, out_path: str, progress: Optional[Callable[[float], None]] = None) -> None:
+    """Composite ``plan`` with moviepy and encode it to ``out_path``."""
+    with metrics.stage("clip_build"):
+        final_video = build_clip(plan)
+    with metrics.stage("encode"):
+        final_video.write_videofile(
+            out_path,
+            fps=plan.fps,
+            codec=plan.codec,
+            audio=plan.include_audio,
+            audio_codec=plan.audio_codec,
+            # pinned so independently encoded segments can be stream-copied together
+            ffmpeg_params=["-pix_fmt", "yuv420p", "-movflags", plan.movflags],
+            logger=_PercentLogger(progress) if progress else "bar",
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Render a RenderPlan JSON file with moviepy.")
+    parser.add_argument("plan")
+    parser.add_argument("out")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    with open(args.plan) as fh:
+        plan = RenderPlan.model_validate_json(fh.read())
+    render(plan, args.out)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,163 @@
+"""Segment-parallel moviepy rendering.
+
+The timeline is cut at scene boundaries, each segment is encoded video-only
+by its own ``python -m moviepy_render`` process with identical encoder
+settings, and the segments are joined by a stream-copy concat before the
+narration is laid over the result.
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import tempfile
+from typing import Callable, List, Optional
+
+import ffmpeg_render
+import metrics
+from render_plan import RenderPlan
+
+logger = logging.getLogger(__name__)
+
+# Segment processes per render; 1 disables segment-parallel rendering
+RENDER_POOL_SIZE = int(os.getenv("RENDER_POOL_SIZE", "1"))
+# Ads shorter than this (seconds) are rendered in a single process
+RENDER_PARALLEL_MIN_DURATION = float(os.getenv("RENDER_PARALLEL_MIN_DURATION", "20"))
+
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _scene_costs(plan: RenderPlan) -> List[float]:
+    """Output seconds each scene's segment would encode, intro/outro/padding included."""
+    ends = []
+    end = plan.intro_duration if plan.intro_path else 0
+    for scene in plan.scenes:
+        end += scene.duration
+        ends.append(end)
+    ends[-1] += plan.outro_duration if plan.include_outro else 0
+    if plan.total_duration:
+        # frames past the trim point are never encoded; padding lands in the last segment
+        ends = [min(e, plan.total_duration) for e in ends]
+        ends[-1] = plan.total_duration
+    return [e - s for s, e in zip([0.0] + ends[:-1], ends)]
+
+
+def _balanced_groups(costs: List[float], segments: int) -> List[int]:
+    """Cut points splitting ``costs`` into contiguous groups with the smallest maximum sum."""
+    n = len(costs)
+    segments = min(segments, n)
+    prefix = [0.0]
+    for c in costs:
+        prefix.append(prefix[-1] + c)
+    inf = float("inf")
+    # best[k][i]: smallest max group sum for the first i scenes in k groups
+    best = [[inf] * (n + 1) for _ in range(segments + 1)]
+    cut = [[0] * (n + 1) for _ in range(segments + 1)]
+    best[0][0] = 0.0
+    for k in range(1, segments + 1):
+        for i in range(k, n + 1):
+            for m in range(k - 1, i):
+                worst = max(best[k - 1][m], prefix[i] - prefix[m])
+                if worst < best[k][i]:
+                    best[k][i], cut[k][i] = worst, m
+    bounds = [n]
+    for k in range(segments, 0, -1):
+        bounds.append(cut[k][bounds[-1]])
+    return bounds[::-1]
+
+
+def split_plan(plan: RenderPlan, segments: int) -> List[RenderPlan]:
+    """Split ``plan`` at scene boundaries into up to ``segments`` parts of similar output length.
+
+    The slowest segment sets the wall time, so the cut points minimize the
+    longest part, counting the intro, outro, trim and padding where they land.
+    """
+    if segments < 2 or len(plan.scenes) < 2:
+        return [plan]
+    bounds = _balanced_groups(_scene_costs(plan), segments)
+    groups = [plan.scenes[start:end] for start, end in zip(bounds, bounds[1:]) if end > start]
+    if len(groups) < 2:
+        return [plan]
+
+    parts = []
+    elapsed = 0.0
+    for i, group in enumerate(groups):
+        last = i == len(groups) - 1
+        part = plan.model_copy(update={
+            "scenes": group,
+            "intro_path": plan.intro_path if i == 0 else None,
+            "include_outro": last,
+            "include_audio": False,
+            "total_duration": None,
+        })
+        if last and plan.total_duration:
+            remaining = plan.total_duration - elapsed
+            if remaining <= 0:
+                # the trim point falls before the last segment
+                return [plan]
+            part = part.model_copy(update={"total_duration": remaining})
+        elapsed += part.timeline_duration
+        parts.append(part)
+    return parts
+
+
+def split_for_pool(plan: RenderPlan, pool_size: int = RENDER_POOL_SIZE) -> List[RenderPlan]:
+    """Segments to render in parallel, or ``[plan]`` when it is not worth it."""
+    if pool_size < 2 or ffmpeg_render.output_duration(plan) < RENDER_PARALLEL_MIN_DURATION:
+        return [plan]
+    return split_plan(plan, pool_size)
+
+
+async def _render_segment(part: RenderPlan, index: int, work_dir: str, sem: asyncio.Semaphore) -> str:
+    plan_path = os.path.join(work_dir, f"segment{index:03d}.json")
+    out_path = os.path.join(work_dir, f"segment{index:03d}.mp4")
+    with open(plan_path, "w") as fh:
+        fh.write(part.model_dump_json())
+    async with sem:
+        # timed here: the segment process's own samples are discarded with it
+        with metrics.stage("segment_render"):
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "moviepy_render", plan_path, out_path,
+                cwd=_MODULE_DIR,
+                env=metrics.untracked_env(),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise ffmpeg_render.FFmpegRenderError(
+            f"segment {index} failed: {stderr.decode(errors='replace')[-2000:]}"
+        )
+    return out_path
+
+
+async def render_segments(
+    plan: RenderPlan,
+    parts: List[RenderPlan],
+    out_path: str,
+    pool_size: int = RENDER_POOL_SIZE,
+    progress: Optional[Callable[[float], None]] = None,
+) -> None:
+    """Encode ``parts`` concurrently and join them into ``out_path``.
+
+    ``progress`` gets the percent of segments finished.
+    """
+    sem = asyncio.Semaphore(pool_size)
+    done = 0
+
+    async def tracked(part: RenderPlan, index: int, work_dir: str) -> str:
+        nonlocal done
+        path = await _render_segment(part, index, work_dir, sem)
+        done += 1
+        if progress:
+            progress(100 * done / len(parts))
+        return path
+
+    with tempfile.TemporaryDirectory(prefix="segrender-") as work_dir:
+        segment_paths = await asyncio.gather(
+            *(tracked(part, i, work_dir) for i, part in enumerate(parts))
+        )
+        list_path = os.path.join(work_dir, "segments.txt")
+        ffmpeg_render.write_concat_list(segment_paths, list_path)
+        await ffmpeg_render.run(ffmpeg_render.build_join_command(list_path, plan, out_path))
+    logger.info(f"Rendered {len(parts)} segments in parallel (pool={pool_size}).")
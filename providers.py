@@ -0,0 +1,129 @@
+"""Registry of lazily constructed provider SDK clients.
+
+The vendor SDKs are slow to import, so neither the API nor the worker
+imports them at start-up. Each one is imported and configured the first
+time ``get(name)`` asks for it, then shared by the whole process.
+Configuration is still validated at start-up by the entry points; the
+factories only read it.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# providers to build ahead of the first request, e.g. "s3,moviepy_render"
+PRELOAD_PROVIDERS = [p for p in os.getenv("PRELOAD_PROVIDERS", "").split(",") if p]
+
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+# one lock per provider, so a slow import never holds up the others
+_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+
+def register(name: str, factory: Callable[[], Any] = None):
+    """Register ``factory`` for ``name``; also usable as a decorator."""
+    if factory is None:
+        return lambda fn: register(name, fn)
+    _factories[name] = factory
+    _instances.pop(name, None)
+    return factory
+
+
+def get(name: str) -> Any:
+    """The provider called ``name``, built on first use."""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _locks[name]:
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+async def aget(name: str) -> Any:
+    """``get`` for coroutines: a provider's first build runs in a thread, off the event loop."""
+    try:
+        return _instances[name]
+    except KeyError:
+        return await asyncio.to_thread(get, name)
+
+
+def loaded() -> List[str]:
+    return sorted(_instances)
+
+
+def preload(names: Optional[Iterable[str]] = None) -> None:
+    """Build ``names`` (default ``PRELOAD_PROVIDERS``) now instead of on first use."""
+    for name in PRELOAD_PROVIDERS if names is None else names:
+        try:
+            get(name)
+        except Exception:
+            # first real use retries and raises to the caller
+            logger.exception(f"Could not preload provider {name}")
+
+
+@register("s3")
+def _s3():
+    import boto3
+
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_REGION"),
+    )
+
+
+@register("openai")
+def _openai():
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+@register("gemini")
+def _gemini():
+    """The configured ``google.generativeai`` module."""
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai
+
+
+@register("facebook")
+def _facebook():
+    """Namespace of the Marketing API classes this project uses."""
+    from facebook_business.api import FacebookAdsApi
+    from facebook_business.adobjects.ad import Ad
+    from facebook_business.adobjects.adaccount import AdAccount
+    from facebook_business.adobjects.adcreative import AdCreative
+    from facebook_business.adobjects.adimage import AdImage
+    from facebook_business.adobjects.adset import AdSet
+    from facebook_business.adobjects.advideo import AdVideo
+    from facebook_business.adobjects.campaign import Campaign
+
+    return SimpleNamespace(
+        FacebookAdsApi=FacebookAdsApi,
+        Ad=Ad,
+        AdAccount=AdAccount,
+        AdCreative=AdCreative,
+        AdImage=AdImage,
+        AdSet=AdSet,
+        AdVideo=AdVideo,
+        Campaign=Campaign,
+    )
+
+
+@register("moviepy_render")
+def _moviepy_render():
+    """The moviepy render engine module (pulls in ``moviepy.editor``)."""
+    import moviepy_render
+
+    return moviepy_render
@@ -0,0 +1,37 @@
+"""Process-wide async token-bucket limiter for upstream API quotas."""
+
+import time
+import asyncio
+
+
+class TokenBucket:
+    """Allow ``rate`` acquisitions per ``per`` seconds with bursts up to ``capacity``.
+
+    Waiters are served in arrival order, so a burst of requests is spread out
+    instead of all of them hitting the upstream rate limit at once.
+    """
+
+    def __init__(self, rate: float, per: float = 60.0, capacity: float = None):
+        self.rate = rate / per
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the upstream answered 429 anyway."""
+        self._refill()
+        self.tokens = min(self.tokens, 0)
@@ -0,0 +1,124 @@
+"""Redis-backed render result cache shared by the API and the Celery worker.
+
+The API coalesces identical in-flight ``generate_video_task`` requests by a
+canonical hash of the ``VideoInput``. The worker extends that hash with the
+content hashes of the fetched assets and the template settings it rendered
+with, and reuses a previous S3 URL on a hit.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+RENDER_CACHE_URL = os.getenv("RENDER_CACHE_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+# How long a rendered video URL is reused for identical requests
+RENDER_CACHE_TTL = int(os.getenv("RENDER_CACHE_TTL", str(24 * 3600)))
+# Upper bound on how long a queued request is considered in flight
+RENDER_INFLIGHT_TTL = int(os.getenv("RENDER_INFLIGHT_TTL", "3600"))
+# Once its task runs, a claim lives this long past the last heartbeat, so a
+# crashed worker blocks identical requests for seconds rather than an hour
+RENDER_HEARTBEAT_TTL = int(os.getenv("RENDER_HEARTBEAT_TTL", "60"))
+
+_client: Optional[redis.Redis] = None
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def get_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(RENDER_CACHE_URL, decode_responses=True)
+    return _client
+
+
+def input_hash(payload: dict) -> str:
+    """Canonical hash of a ``VideoInput`` dict (cache flags excluded)."""
+    payload = {k: v for k, v in payload.items() if k != "no_cache"}
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def result_key(input_digest: str, asset_digests: Iterable[str], config: Optional[dict] = None) -> str:
+    """Key of a rendered video; ``config`` is the template config it was rendered with."""
+    raw = json.dumps([input_digest, list(asset_digests), config or {}], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def claim_inflight(input_digest: str, task_id: str) -> Optional[str]:
+    """Register ``task_id`` for this input; return the existing task id if one is running."""
+    try:
+        client = get_client()
+        if client.set(f"render:inflight:{input_digest}", task_id, nx=True, ex=RENDER_INFLIGHT_TTL):
+            return None
+        return client.get(f"render:inflight:{input_digest}")
+    except redis.RedisError as e:
+        logger.warning(f"[render cache] inflight claim failed: {e}")
+        return None
+
+
+def release_inflight(input_digest: str, task_id: str) -> None:
+    try:
+        # compare-and-delete in one step, so a claim taken over by another
+        # task after ours expired is never released
+        get_client().eval(_RELEASE_SCRIPT, 1, f"render:inflight:{input_digest}", task_id)
+    except redis.RedisError as e:
+        logger.warning(f"[render cache] inflight release failed: {e}")
+
+
+@contextmanager
+def heartbeat(input_digest: str, task_id: str, ttl: int = RENDER_HEARTBEAT_TTL):
+    """Keep ``task_id``'s claim alive with a short TTL while the block runs."""
+    key = f"render:inflight:{input_digest}"
+    stop = threading.Event()
+
+    def beat() -> None:
+        while True:
+            try:
+                get_client().eval(_REFRESH_SCRIPT, 1, key, task_id, ttl)
+            except redis.RedisError as e:
+                logger.warning(f"[render cache] inflight heartbeat failed: {e}")
+            if stop.wait(ttl / 3):
+                return
+
+    thread = threading.Thread(target=beat, name=f"render-heartbeat-{task_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def get_result(key: str) -> Optional[str]:
+    try:
+        return get_client().get(f"render:result:{key}")
+    except redis.RedisError as e:
+        logger.warning(f"[render cache] lookup failed: {e}")
+        return None
+
+
+def store_result(key: str, url: str) -> None:
+    try:
+        get_client().set(f"render:result:{key}", url, ex=RENDER_CACHE_TTL)
+    except redis.RedisError as e:
+        logger.warning(f"[render cache] store failed: {e}")
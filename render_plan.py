@@ -0,0 +1,48 @@
+"""Resolved, engine-independent description of one video render."""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class PlannedScene(BaseModel):
+    duration: float
+    image_path: Optional[str] = None
+    text: Optional[str] = None
+    text_fontsize: int = 48
+    audio_path: Optional[str] = None
+    # measured length of the narration; shorter narration is padded with silence
+    audio_duration: Optional[float] = None
+
+
+class RenderPlan(BaseModel):
+    """Everything a render engine needs once all assets are on local disk."""
+
+    width: int
+    height: int
+    fps: int
+    scenes: List[PlannedScene]
+    intro_path: Optional[str] = None
+    intro_duration: float = 0
+    outro_text: str = "Visit our website!"
+    outro_fontsize: int = 48
+    outro_duration: float = 2
+    total_duration: Optional[float] = None
+    codec: str = "libx264"
+    audio_codec: str = "aac"
+    # cleared for timeline segments rendered apart from the full ad
+    include_outro: bool = True
+    include_audio: bool = True
+    # fragmented MP4 needs no seeking, so it can be written into a pipe
+    fragmented: bool = False
+
+    @property
+    def movflags(self) -> str:
+        return "frag_keyframe+empty_moov+default_base_moof" if self.fragmented else "+faststart"
+
+    @property
+    def timeline_duration(self) -> float:
+        """Length of intro + scenes + outro before trimming/padding."""
+        intro = self.intro_duration if self.intro_path else 0
+        outro = self.outro_duration if self.include_outro else 0
+        return intro + sum(s.duration for s in self.scenes) + outro
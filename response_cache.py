@@ -0,0 +1,121 @@
+"""Two-tier response cache (in-process LRU + shared Redis) with single-flight loads."""
+
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache:
+    """Cache JSON-serializable values in memory and, optionally, in Redis.
+
+    Concurrent ``get_or_load`` calls for the same key share one ``loader``
+    call; only the first caller reaches upstream. The shared load outlives
+    any single caller being cancelled.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = 1024, ttl: float = 3600, redis_url: Optional[str] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._redis = aioredis.from_url(redis_url) if redis_url else None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any) -> None:
+        self._local[key] = (time.monotonic() + self.ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._get_local(key)
+        if value is not None or self._redis is None:
+            return value
+        try:
+            raw = await self._redis.get(f"{self.namespace}:{key}")
+        except redis.RedisError as e:
+            logger.warning(f"[{self.namespace}] Redis read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self._set_local(key, value)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._set_local(key, value)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(f"{self.namespace}:{key}", json.dumps(value), ex=int(self.ttl))
+        except redis.RedisError as e:
+            logger.warning(f"[{self.namespace}] Redis write failed: {e}")
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        refresh: bool = False,
+    ) -> Tuple[Any, bool]:
+        """Return ``(value, from_cache)``; ``refresh`` skips the lookup but still stores.
+
+        A refresh always runs its own load: joining an in-flight load could
+        hand back the result the caller asked to replace.
+        """
+        if refresh:
+            self.misses += 1
+            value = await loader()
+            await self.set(key, value)
+            return value, False
+        value = await self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value, True
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), True
+        self.misses += 1
+        # the load runs in its own task, so cancelling the caller that started
+        # it (e.g. a disconnected client) does not fail the callers joined to it
+        task = asyncio.create_task(self._load(key, loader))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish_load(key, t))
+        return await asyncio.shield(task), False
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        await self.set(key, value)
+        return value
+
+    def _finish_load(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # every caller may have gone away; retrieve the error so it is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "entries": len(self._local)}
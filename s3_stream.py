@@ -0,0 +1,268 @@
+"""Streaming S3 multipart uploads with per-part retries."""
+
+import os
+import asyncio
+import logging
+import tempfile
+import threading
+from typing import AsyncIterator, Awaitable, Callable, List, Union
+
+import httpx
+from tenacity import retry, stop_after_attempt, wait_fixed
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# S3 requires every part but the last to be at least 5 MiB
+S3_PART_SIZE = max(int(os.getenv("S3_PART_SIZE", str(8 * 1024 ** 2))), 5 * 1024 ** 2)
+S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+# Read size when pulling from a remote URL or an uploaded file
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(256 * 1024)))
+
+retry_config = dict(stop=stop_after_attempt(3), wait=wait_fixed(2), before_sleep=metrics.record_retry)
+
+
+class MultipartUpload:
+    """Upload a byte stream to S3 in parts while it is still being produced.
+
+    Memory is bounded by ``part_size * (concurrency + 1)``. Use as an async
+    context manager: the upload completes on a clean exit and is aborted if
+    the body raises. Objects smaller than one part are sent with a single
+    ``put_object`` and never start a multipart upload.
+    """
+
+    def __init__(self, s3_client, bucket: str, key: str, content_type: str,
+                 part_size: int = S3_PART_SIZE, concurrency: int = S3_UPLOAD_CONCURRENCY):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.upload_id = None
+        self.parts: List[dict] = []
+        # stream offset covered by parts already handed to S3 (each retried on its own)
+        self.bytes_queued = 0
+        self._buffer = bytearray()
+        self._pending: List[asyncio.Task] = []
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self) -> "MultipartUpload":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            await self.abort()
+            return
+        try:
+            await self.complete()
+        except BaseException:
+            # a failed part or complete call must not leave a billed, orphaned upload
+            await self.abort()
+            raise
+
+    @retry(**retry_config)
+    async def _put_part(self, number: int, body: Union[bytes, bytearray]) -> None:
+        with metrics.upstream("s3", "upload_part"):
+            resp = await asyncio.to_thread(
+                self.s3_client.upload_part,
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=number,
+                Body=body,
+            )
+        self.parts.append({"PartNumber": number, "ETag": resp["ETag"]})
+
+    @property
+    def received(self) -> int:
+        """Bytes written so far, i.e. the offset a resumed source should continue from."""
+        return self.bytes_queued + len(self._buffer)
+
+    def restart(self) -> None:
+        """Drop buffered bytes so the source can be re-read from the start."""
+        if self.bytes_queued:
+            raise RuntimeError(f"cannot restart {self.key}: parts were already uploaded")
+        self._buffer.clear()
+
+    async def _send(self, body: Union[bytes, bytearray]) -> None:
+        if self.upload_id is None:
+            with metrics.upstream("s3", "create_multipart_upload"):
+                resp = await asyncio.to_thread(
+                    self.s3_client.create_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    ContentType=self.content_type,
+                    ACL="public-read",
+                )
+            self.upload_id = resp["UploadId"]
+        number = len(self._pending) + 1
+        await self._slots.acquire()
+        self.bytes_queued += len(body)
+
+        async def run():
+            try:
+                await self._put_part(number, body)
+            finally:
+                self._slots.release()
+
+        self._pending.append(asyncio.create_task(run()))
+        failed = [t for t in self._pending if t.done() and t.exception()]
+        if failed:
+            raise failed[0].exception()
+
+    async def write(self, data: bytes) -> None:
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.part_size:
+            body = self._buffer[:self.part_size]
+            del self._buffer[:self.part_size]
+            await self._send(body)
+
+    @retry(**retry_config)
+    async def _put_object(self, body: Union[bytes, bytearray]) -> None:
+        with metrics.upstream("s3", "put_object"):
+            await asyncio.to_thread(
+                self.s3_client.put_object,
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=body,
+                ContentType=self.content_type,
+                ACL="public-read",
+            )
+
+    async def complete(self) -> None:
+        if self.upload_id is None:
+            # botocore takes the bytearray as is; no need for a second copy
+            await self._put_object(self._buffer)
+            self.bytes_queued += len(self._buffer)
+            self._buffer.clear()
+            return
+        if self._buffer:
+            # hand the tail over instead of copying it; the upload task owns it now
+            tail, self._buffer = self._buffer, bytearray()
+            await self._send(tail)
+        await asyncio.gather(*self._pending)
+        with metrics.upstream("s3", "complete_multipart_upload"):
+            await asyncio.to_thread(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": sorted(self.parts, key=lambda p: p["PartNumber"])},
+            )
+        logger.info(f"Completed multipart upload of {self.key} in {len(self.parts)} parts")
+
+    async def abort(self) -> None:
+        for task in self._pending:
+            task.cancel()
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        if self.upload_id:
+            try:
+                await asyncio.to_thread(
+                    self.s3_client.abort_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self.upload_id,
+                )
+                logger.warning(f"Aborted multipart upload of {self.key}")
+            except Exception as e:
+                logger.error(f"Failed to abort multipart upload of {self.key}: {e}")
+
+
+async def stream_to_s3(
+    produce: Callable[[str], Awaitable[None]],
+    s3_client,
+    bucket: str,
+    key: str,
+    content_type: str,
+) -> None:
+    """Run ``produce(path)`` writing into a FIFO and upload what it writes as it goes.
+
+    The producer must write a non-seekable format (e.g. fragmented MP4), since
+    nothing is ever stored on disk.
+    """
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryDirectory(prefix="s3stream-") as work_dir:
+        fifo = os.path.join(work_dir, "out" + os.path.splitext(key)[1])
+        os.mkfifo(fifo)
+        async with MultipartUpload(s3_client, bucket, key, content_type) as upload:
+            stop = threading.Event()
+            # open both ends here, so the pump never waits in open(); our write end
+            # keeps reads from hitting EOF until the producer is done with the FIFO
+            read_fd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+            hold_fd = os.open(fifo, os.O_WRONLY)
+            os.set_blocking(read_fd, True)
+
+            def pump() -> None:
+                with os.fdopen(read_fd, "rb") as fh:
+                    while not stop.is_set():
+                        chunk = fh.read(upload.part_size)
+                        if not chunk:
+                            break
+                        asyncio.run_coroutine_threadsafe(upload.write(chunk), loop).result()
+
+            reader = asyncio.ensure_future(asyncio.to_thread(pump))
+            try:
+                await produce(fifo)
+            except BaseException:
+                stop.set()
+                os.close(hold_fd)
+                await asyncio.gather(reader, return_exceptions=True)
+                raise
+            # EOF once the producer's write end is closed too (or it never opened one)
+            os.close(hold_fd)
+            await reader
+
+
+async def upload_chunks(chunks: AsyncIterator[bytes], s3_client, bucket: str, key: str, content_type: str) -> int:
+    """Upload an async byte iterator; returns the object size."""
+    async with MultipartUpload(s3_client, bucket, key, content_type) as upload:
+        async for chunk in chunks:
+            await upload.write(chunk)
+    return upload.bytes_queued
+
+
+async def upload_file(file, s3_client, bucket: str, key: str, content_type: str) -> int:
+    """Upload an object with an async ``read(n)`` (e.g. FastAPI's UploadFile)."""
+
+    async def chunks():
+        while chunk := await file.read(STREAM_CHUNK_SIZE):
+            yield chunk
+
+    return await upload_chunks(chunks(), s3_client, bucket, key, content_type)
+
+
+async def copy_url_to_s3(
+    client: httpx.AsyncClient,
+    url: str,
+    s3_client,
+    bucket: str,
+    key: str,
+    content_type: str,
+    attempts: int = 3,
+) -> int:
+    """Stream ``url`` into S3 without holding the whole body in memory.
+
+    If the download breaks partway, it resumes with a ``Range`` request from
+    the last byte received. Origins that ignore ``Range`` are re-read from
+    the start, as long as no part has been uploaded yet.
+    """
+    async with MultipartUpload(s3_client, bucket, key, content_type) as upload:
+        for attempt in range(1, attempts + 1):
+            offset = upload.received
+            headers = {"Range": f"bytes={offset}-"} if offset else None
+            try:
+                async with client.stream("GET", url, headers=headers) as resp:
+                    resp.raise_for_status()
+                    if offset and resp.status_code != 206:
+                        logger.warning(f"{url} ignored Range request; restarting transfer")
+                        upload.restart()
+                    async for chunk in resp.aiter_bytes(STREAM_CHUNK_SIZE):
+                        await upload.write(chunk)
+                break
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if attempt == attempts:
+                    raise
+                logger.warning(f"Transfer of {url} interrupted at byte {upload.received} ({e}); retrying")
+                await asyncio.sleep(2)
+    return upload.bytes_queued
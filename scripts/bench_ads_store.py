@@ -0,0 +1,123 @@
+"""Benchmark saved-ad storage for users with many ads.
+
+Compares the old list-of-dicts layout (linear scans) with the memory and
+SQLite backends of ``ads_store``. Run from the project root::
+
+    python scripts/bench_ads_store.py                 # 10k ads for one user
+    python scripts/bench_ads_store.py --ads 50000 --ops 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ads_store  # noqa: E402
+
+USER = "bench"
+
+
+class LegacyListStore(ads_store.AdsStore):
+    """The former ``USER_SAVED_ADS`` dict of lists, for comparison."""
+
+    def __init__(self):
+        self.ads = {}
+        self.next_id = 1
+
+    async def create(self, user_id, fields):
+        ad = {**fields, "id": self.next_id, "user_id": user_id, "created_at": datetime.utcnow()}
+        self.next_id += 1
+        self.ads.setdefault(user_id, []).append(ad)
+        return ad
+
+    async def get(self, user_id, ad_id):
+        for ad in self.ads.get(user_id, []):
+            if ad["id"] == ad_id:
+                return ad
+        return None
+
+    async def update(self, user_id, ad_id, fields):
+        for i, ad in enumerate(self.ads.get(user_id, [])):
+            if ad["id"] == ad_id:
+                self.ads[user_id][i] = {**ad, **fields}
+                return self.ads[user_id][i]
+        return None
+
+    async def delete(self, user_id, ad_id):
+        before = len(self.ads.get(user_id, []))
+        self.ads[user_id] = [ad for ad in self.ads.get(user_id, []) if ad["id"] != ad_id]
+        return len(self.ads[user_id]) != before
+
+    async def list(self, user_id, limit=50, cursor=None, descending=True):
+        # the old endpoint returned everything in one response
+        return list(self.ads.get(user_id, [])), None
+
+
+async def timed(label: str, n: int, fn) -> None:
+    start = time.perf_counter()
+    # fn may return the number of operations it actually made
+    n = await fn() or n
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {1e6 * elapsed / n:>10.1f} us/op   ({n} ops, {elapsed:.3f}s)")
+
+
+async def bench(store: ads_store.AdsStore, n_ads: int, n_ops: int, page: int) -> None:
+    ids = []
+
+    async def insert():
+        for i in range(n_ads):
+            ids.append((await store.create(USER, {"name": f"ad {i}", "headline": "Shop now"}))["id"])
+
+    async def get():
+        for ad_id in random.sample(ids, n_ops):
+            await store.get(USER, ad_id)
+
+    async def update():
+        for ad_id in random.sample(ids, n_ops):
+            await store.update(USER, ad_id, {"headline": "Updated"})
+
+    async def paginate():
+        cursor, pages = None, 0
+        while True:
+            _, cursor = await store.list(USER, page, cursor)
+            pages += 1
+            if not cursor:
+                return pages
+
+    async def delete():
+        for ad_id in random.sample(ids, n_ops):
+            await store.delete(USER, ad_id)
+
+    await timed("insert", n_ads, insert)
+    await timed("get", n_ops, get)
+    await timed("update", n_ops, update)
+    await timed("page", 1, paginate)
+    await timed("delete", n_ops, delete)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ads", type=int, default=10_000, help="ads saved by the benchmark user")
+    parser.add_argument("--ops", type=int, default=1_000, help="random get/update/delete operations")
+    parser.add_argument("--page", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "legacy list": LegacyListStore(),
+            "memory": ads_store.MemoryAdsStore(),
+            "sqlite": ads_store.SqliteAdsStore(os.path.join(tmp, "ads.db")),
+        }
+        for name, store in stores.items():
+            print(f"{name}:")
+            await bench(store, args.ads, min(args.ops, args.ads), args.page)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
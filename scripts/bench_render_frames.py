@@ -0,0 +1,74 @@
+"""Benchmark moviepy frame throughput with and without static-frame reuse.
+
+Run from the project root::
+
+    python scripts/bench_render_frames.py            # frame generation only
+    python scripts/bench_render_frames.py --encode   # include libx264 encode
+    python scripts/bench_render_frames.py --text     # overlay text on every scene
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import imageio
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moviepy_render import build_clip  # noqa: E402
+from render_plan import PlannedScene, RenderPlan  # noqa: E402
+
+RESOLUTIONS = [(720, 1280), (1080, 1920)]
+
+
+def make_plan(width: int, height: int, image_path: str, text: bool, fps: int) -> RenderPlan:
+    scenes = [
+        PlannedScene(duration=3, image_path=image_path if i % 2 == 0 else None, text="Shop now" if text else None)
+        for i in range(8)
+    ]
+    return RenderPlan(
+        width=width,
+        height=height,
+        fps=fps,
+        scenes=scenes,
+        outro_text="Learn More at Our Website!",
+        total_duration=30,
+    )
+
+
+def run(plan: RenderPlan, reuse: bool, encode: bool) -> float:
+    clip = build_clip(plan, reuse_static_frames=reuse)
+    start = time.perf_counter()
+    if encode:
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as out:
+            clip.write_videofile(out.name, fps=plan.fps, codec=plan.codec, audio=False, logger=None)
+    else:
+        for _ in clip.iter_frames(fps=plan.fps, dtype="uint8"):
+            pass
+    elapsed = time.perf_counter() - start
+    return clip.duration * plan.fps / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--encode", action="store_true", help="measure a full libx264 encode")
+    parser.add_argument("--text", action="store_true", help="add a text overlay to every scene")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "scene.png")
+        imageio.imwrite(image_path, np.random.randint(0, 255, (1024, 1024, 3), dtype=np.uint8))
+        print(f"{'resolution':>12} {'baseline fps':>14} {'reuse fps':>12} {'speedup':>9}")
+        for width, height in RESOLUTIONS:
+            plan = make_plan(width, height, image_path, args.text, args.fps)
+            before = run(plan, reuse=False, encode=args.encode)
+            after = run(plan, reuse=True, encode=args.encode)
+            print(f"{width}x{height:>7} {before:>14.1f} {after:>12.1f} {after / before:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Measure cold-start import time and memory of the Procfile entry points.
+
+Each target is imported in a fresh interpreter, so nothing is shared with
+earlier runs. Run from the project root::
+
+    python scripts/bench_startup.py                       # web and worker
+    python scripts/bench_startup.py --repeat 5 worker
+    python scripts/bench_startup.py --max-seconds 2 --max-rss-mb 250
+
+With ``--max-seconds`` / ``--max-rss-mb`` the script exits non-zero when a
+target exceeds the budget, so it can gate CI. Missing configuration is
+filled with placeholder values; no network calls are made at import time.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module imported by each Procfile entry
+TARGETS = {
+    "web": "main",
+    "worker": "celery_worker",
+}
+
+# heavy SDKs that should only load on first use
+WATCHED_MODULES = ["boto3", "openai", "google.generativeai", "facebook_business", "moviepy.editor"]
+
+PLACEHOLDER_ENV = {
+    "GEMINI_API_KEY": "bench",
+    "OPENAI_API_KEY": "bench",
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "AWS_REGION": "us-east-1",
+    "S3_BUCKET_NAME": "bench",
+}
+
+PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - start
+watched = json.loads(sys.argv[2])
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in watched if m in sys.modules],
+}))
+"""
+
+
+def measure(module: str) -> dict:
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, module, json.dumps(WATCHED_MODULES)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", choices=sorted(TARGETS), default=sorted(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float)
+    parser.add_argument("--max-rss-mb", type=float)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'target':<8} {'import s':>9} {'max RSS MB':>11}  eagerly loaded SDKs")
+    for target in args.targets:
+        runs = [measure(TARGETS[target]) for _ in range(args.repeat)]
+        seconds = statistics.median(r["seconds"] for r in runs)
+        rss = statistics.median(r["rss_mb"] for r in runs)
+        loaded = ", ".join(runs[-1]["loaded"]) or "-"
+        print(f"{target:<8} {seconds:>9.2f} {rss:>11.1f}  {loaded}")
+        if args.max_seconds is not None and seconds > args.max_seconds:
+            print(f"  {target}: import time {seconds:.2f}s exceeds {args.max_seconds:.2f}s")
+            failed = True
+        if args.max_rss_mb is not None and rss > args.max_rss_mb:
+            print(f"  {target}: RSS {rss:.1f} MB exceeds {args.max_rss_mb:.1f} MB")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Rasterize every template outro at the warm sizes and fail on any error.
+
+Outros that wrap onto several lines get fractional bounding boxes from
+Pillow, which used to crash ``Image.new``. Run from the project root::
+
+    python scripts/check_text_raster.py
+    python scripts/check_text_raster.py --sizes 360x640,720x1280
+
+Exits non-zero if an outro fails to rasterize or does not fit the frame.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the worker module only needs these to be set, not valid
+for name in ("GEMINI_API_KEY", "OPENAI_API_KEY", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "S3_BUCKET_NAME"):
+    os.environ.setdefault(name, "check")
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+import text_raster  # noqa: E402
+from celery_worker import VIDEO_TEMPLATE_CONFIGS  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="360x640,720x1280,1080x1920", help="comma-separated WxH frame sizes")
+    args = parser.parse_args()
+    sizes = [tuple(int(v) for v in size.split("x")) for size in args.sizes.split(",") if size]
+
+    failed = False
+    wrapped = 0
+    for template_id, cfg in VIDEO_TEMPLATE_CONFIGS.items():
+        text, fontsize = cfg.get("final_outro_text"), cfg.get("text_fontsize", 48)
+        if not text:
+            continue
+        for width, height in sizes:
+            label = f"{template_id:<16} {width}x{height:<5}"
+            try:
+                arr = text_raster.render_text(text, fontsize=fontsize, canvas_size=(width, height))
+            except Exception as e:
+                print(f"{label} FAIL {type(e).__name__}: {e}")
+                failed = True
+                continue
+            wrap_width = int(width * (1 - 2 * text_raster.TEXT_WRAP_MARGIN))
+            lines = len(text_raster.wrap_text(text, text_raster._load_font(None, fontsize), wrap_width))
+            wrapped += lines > 1
+            ok = arr.shape[1] <= width and arr.shape[0] <= height
+            failed |= not ok
+            print(f"{label} {'ok  ' if ok else 'FAIL'} {arr.shape[1]}x{arr.shape[0]} in {lines} line(s)")
+    if not wrapped:
+        print("warning: no outro wrapped at these sizes; the multi-line path was not exercised")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Local stand-in for the parts of the Graph API used to publish ads.
+
+Serves batch requests (``POST /<version>/`` with ``batch=[...]``) and single
+``POST /<version>/act_<id>/<edge>`` calls, resolves ``{result=<step>:$.id}``
+references and keeps created objects in memory. Run it and point the API
+and worker at it::
+
+    python scripts/fake_graph.py --port 8090 --latency 0.15
+    META_GRAPH_URL=http://localhost:8090 celery -A celery_worker worker
+
+``--latency`` adds a simulated round trip to every HTTP request, so the
+difference between one batch and sequential calls shows up in task times.
+``--fail create_ad`` makes every batch step with that name fail, which
+exercises the per-step error mapping. ``GET /<version>/<id>`` returns a
+created object.
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# edge -> (type of the created object, parent field that must name an existing object)
+EDGES = {
+    "campaigns": ("campaign", None),
+    "adsets": ("adset", "campaign_id"),
+    "adcreatives": ("creative", None),
+    "ads": ("ad", "adset_id"),
+    "adimages": ("image", None),
+    "advideos": ("video", None),
+}
+_REFERENCE = re.compile(r"\{result=([^:}]+):\$\.([^}]+)\}")
+
+_ids = itertools.count(120200000000001)
+_lock = threading.Lock()
+objects = {}
+
+
+def graph_error(message: str, code: int = 100) -> dict:
+    return {"error": {"message": message, "type": "OAuthException", "code": code, "fbtrace_id": "fake"}}
+
+
+def create(path: str, params: dict):
+    """``(status, body)`` for a POST to ``act_<id>/<edge>``."""
+    parts = path.strip("/").split("/")
+    if len(parts) != 2 or not parts[0].startswith("act_") or parts[1] not in EDGES:
+        return 400, graph_error(f"Unsupported path: {path}")
+    edge = parts[1]
+    kind, parent_field = EDGES[edge]
+    if parent_field:
+        parent_kind = parent_field[:-len("_id")]
+        if objects.get(params.get(parent_field, ""), {}).get("type") != parent_kind:
+            return 400, graph_error(f"Invalid parameter: {parent_field} {params.get(parent_field)!r} is not a {parent_kind}")
+    if edge == "ads":
+        creative = json.loads(params.get("creative") or "{}").get("creative_id")
+        if objects.get(creative, {}).get("type") != "creative":
+            return 400, graph_error(f"Invalid parameter: creative {creative!r} does not exist")
+    with _lock:
+        object_id = str(next(_ids))
+        objects[object_id] = {"id": object_id, "type": kind, "account": parts[0], **params}
+    if edge == "adimages":
+        return 200, {"images": {"upload": {"hash": f"hash{object_id}"}}}
+    return 200, {"id": object_id}
+
+
+def run_batch(steps: list, fail: set) -> list:
+    results = {}
+    failed = set()
+    reply = []
+    for step in steps:
+        name = step.get("name")
+        refs = _REFERENCE.findall(step.get("relative_url", "") + step.get("body", ""))
+        if any(ref in failed or ref not in results for ref, _ in refs):
+            # Graph leaves steps whose dependencies failed empty
+            failed.add(name)
+            reply.append(None)
+            continue
+
+        def resolve(match):
+            value = results[match.group(1)]
+            for key in match.group(2).split("."):
+                value = value[key]
+            return str(value)
+
+        url = _REFERENCE.sub(resolve, step.get("relative_url", ""))
+        body = _REFERENCE.sub(resolve, step.get("body", ""))
+        params = {k: v[0] for k, v in parse_qs(body).items()}
+        if name in fail:
+            status, result = 500, graph_error(f"Injected failure for {name}", code=2)
+        elif step.get("method", "GET").upper() != "POST":
+            status, result = 400, graph_error("Only POST is supported by the fake Graph server")
+        else:
+            status, result = create(url, params)
+        if status >= 400:
+            failed.add(name)
+        else:
+            results[name] = result
+        reply.append({"code": status, "body": json.dumps(result)})
+    return reply
+
+
+class Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail: set = set()
+
+    def _reply(self, status: int, body) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _path(self) -> str:
+        # drop the version prefix, e.g. /v18.0/act_1/ads -> act_1/ads
+        parts = urlsplit(self.path).path.strip("/").split("/", 1)
+        return parts[1] if len(parts) > 1 else ""
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        obj = objects.get(self._path())
+        self._reply(200 if obj else 404, obj or graph_error("Object does not exist", code=803))
+
+    def do_POST(self):
+        time.sleep(self.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        if not params.get("access_token"):
+            self._reply(400, graph_error("An access token is required", code=104))
+            return
+        path = self._path()
+        if not path and "batch" in params:
+            self._reply(200, run_batch(json.loads(params["batch"]), self.fail))
+            return
+        status, body = create(path, params)
+        self._reply(status, body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP request")
+    parser.add_argument("--fail", action="append", default=[], help="batch step name that always fails")
+    args = parser.parse_args()
+    Handler.latency = args.latency
+    Handler.fail = set(args.fail)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Fake Graph API on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
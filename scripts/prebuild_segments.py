@@ -0,0 +1,51 @@
+"""Pre-encode template outros and padding blocks at deploy time.
+
+Run from the project root with the worker's environment loaded::
+
+    python scripts/prebuild_segments.py --sizes 720x1280,1080x1920 --fps 30
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from celery_worker import VIDEO_TEMPLATE_CONFIGS  # noqa: E402
+from render_plan import RenderPlan  # noqa: E402
+from segment_store import segment_store  # noqa: E402
+
+
+async def prebuild(sizes, fps: int) -> None:
+    for template_id, cfg in VIDEO_TEMPLATE_CONFIGS.items():
+        if cfg.get("placeholder_url"):
+            continue
+        for width, height in sizes:
+            plan = RenderPlan(
+                width=width,
+                height=height,
+                fps=fps,
+                scenes=[],
+                outro_text=cfg.get("final_outro_text", "Visit our website!"),
+                outro_fontsize=cfg.get("text_fontsize", 48),
+                outro_duration=cfg.get("outro_duration", 2),
+            )
+            await segment_store.outro(plan)
+            # every power-of-two block up to the template length
+            max_frames = int(cfg.get("video_duration", 60) * fps)
+            await segment_store.padding(plan, (1 << max_frames.bit_length()) - 1)
+            print(f"{template_id}: {width}x{height}@{fps} ready")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="720x1280,1080x1920")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+    sizes = [tuple(int(v) for v in s.split("x")) for s in args.sizes.split(",") if s]
+    asyncio.run(prebuild(sizes, args.fps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Store of pre-encoded outro and padding segments spliced in by stream copy.
+
+The outro of an ad depends only on the template config and the output
+format, and the black padding only on the format and its length. Both are
+encoded once per (config, width, height, fps, codec params, text style) and
+kept on disk keyed by a hash of exactly those inputs, so a template config
+or font change simply yields new keys while stale files age out of the LRU.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import List
+
+import ffmpeg_render
+import text_raster
+from asset_cache import DiskCache
+from render_plan import RenderPlan
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_STORE_DIR = os.getenv("SEGMENT_STORE_DIR", os.path.join(tempfile.gettempdir(), "clipopera_segments"))
+SEGMENT_STORE_MAX_BYTES = int(os.getenv("SEGMENT_STORE_MAX_BYTES", str(512 * 1024 ** 2)))
+# bump when the way segments are encoded changes
+SEGMENT_FORMAT_VERSION = 1
+
+
+def _text_style() -> dict:
+    """Raster settings baked into outro pixels; a changed font must yield new keys."""
+    font = text_raster.TEXT_FONT_PATH
+    try:
+        st = os.stat(font) if font else None
+    except OSError:
+        st = None
+    return {
+        "font": font,
+        # the same path may be replaced by another file
+        "font_file": [st.st_size, st.st_mtime_ns] if st else None,
+        "wrap_margin": text_raster.TEXT_WRAP_MARGIN,
+    }
+
+
+class SegmentStore(DiskCache):
+    def __init__(self, root: str = SEGMENT_STORE_DIR, max_bytes: int = SEGMENT_STORE_MAX_BYTES):
+        super().__init__(root, max_bytes)
+        self._building: dict = {}
+
+    def _key(self, kind: str, plan: RenderPlan, **params) -> str:
+        raw = json.dumps({
+            "kind": kind,
+            "version": SEGMENT_FORMAT_VERSION,
+            "width": plan.width,
+            "height": plan.height,
+            "fps": plan.fps,
+            "codec": ffmpeg_render.video_codec_args(plan),
+            "text_style": _text_style(),
+            **params,
+        }, sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def _get_or_build(self, key: str, build) -> str:
+        path = self.blob_path(key, ".mp4")
+        if os.path.exists(path):
+            self.hits += 1
+            self.touch(path)
+            return path
+        # coalesce concurrent builds of the same segment within this process
+        if key not in self._building:
+            self._building[key] = asyncio.ensure_future(self._build(path, build))
+        try:
+            await self._building[key]
+        finally:
+            self._building.pop(key, None)
+        return path
+
+    async def _build(self, path: str, build) -> None:
+        self.misses += 1
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".mp4")
+        os.close(fd)
+        try:
+            await build(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.evict()
+        logger.info(f"[segments] Encoded {os.path.basename(path)}")
+
+    async def outro(self, plan: RenderPlan) -> str:
+        """Pre-encoded outro for the plan's template settings and format."""
+        key = self._key(
+            "outro",
+            plan,
+            text=plan.outro_text,
+            fontsize=plan.outro_fontsize,
+            duration=plan.outro_duration,
+        )
+        outro_plan = plan.model_copy(update={
+            "scenes": [],
+            "intro_path": None,
+            "include_outro": True,
+            "include_audio": False,
+            "total_duration": None,
+        })
+        return await self._get_or_build(key, lambda tmp: ffmpeg_render.render(outro_plan, tmp))
+
+    async def padding(self, plan: RenderPlan, frames: int) -> List[str]:
+        """Black segments totalling ``frames`` frames, built from power-of-two blocks."""
+        paths = []
+        bit = 0
+        while frames >> bit:
+            if frames >> bit & 1:
+                n = 1 << bit
+                key = self._key("pad", plan, frames=n)
+                paths.append(await self._get_or_build(key, lambda tmp, n=n: self._encode_black(plan, n, tmp)))
+            bit += 1
+        return paths[::-1]
+
+    async def _encode_black(self, plan: RenderPlan, frames: int, out_path: str) -> None:
+        cmd = [
+            ffmpeg_render.ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"color=c=black:s={plan.width}x{plan.height}:r={plan.fps}",
+            "-frames:v", str(frames), "-r", str(plan.fps),
+            *ffmpeg_render.video_codec_args(plan), "-f", "mp4", out_path,
+        ]
+        await ffmpeg_render.run(cmd)
+
+
+segment_store = SegmentStore()
+
+
+def can_splice(plan: RenderPlan) -> bool:
+    """Whether the outro survives untrimmed, so it can be stream-copied in."""
+    if not plan.include_outro or not (plan.scenes or plan.intro_path):
+        return False
+    return not plan.total_duration or plan.timeline_duration <= plan.total_duration
+
+
+def body_plan(plan: RenderPlan) -> RenderPlan:
+    """The part of ``plan`` that still has to be encoded per render."""
+    return plan.model_copy(update={"include_outro": False, "include_audio": False, "total_duration": None})
+
+
+async def tail_segments(plan: RenderPlan) -> List[str]:
+    """Outro followed by any padding needed to reach the template length."""
+    paths = [await segment_store.outro(plan)]
+    if plan.total_duration:
+        frames = round((plan.total_duration - plan.timeline_duration) * plan.fps)
+        if frames > 0:
+            paths += await segment_store.padding(plan, frames)
+    return paths
+
+
+async def splice(plan: RenderPlan, body_path: str, tail: List[str], out_path: str) -> None:
+    """Stream-copy ``body_path`` + ``tail`` into ``out_path`` and mux the narration."""
+    with tempfile.TemporaryDirectory(prefix="splice-") as work_dir:
+        list_path = os.path.join(work_dir, "segments.txt")
+        ffmpeg_render.write_concat_list([body_path, *tail], list_path)
+        await ffmpeg_render.run(ffmpeg_render.build_join_command(list_path, plan, out_path))
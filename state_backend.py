@@ -0,0 +1,232 @@
+"""Pluggable store for API state shared between processes.
+
+Holds the user table, linked Meta tokens and each user's uploaded models.
+``MemoryStateBackend`` keeps the old per-process dicts (fine for a single
+uvicorn worker); ``RedisStateBackend`` shares them through Redis so the API
+can run with ``--workers N`` or on several dynos. Either can be wrapped in
+``CachedStateBackend`` to serve hot reads from a short-lived local cache.
+
+Values must be JSON-serializable. Keys live in namespaces (``"users"``,
+``"meta_tokens"``, ...); each key holds either a value or a list. Counters
+(``incr``/``counter``) are kept apart from values.
+"""
+
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+# seconds a value read from the shared backend is served from process memory (0 disables)
+STATE_CACHE_TTL = float(os.getenv("STATE_CACHE_TTL", "5"))
+STATE_CACHE_SIZE = int(os.getenv("STATE_CACHE_SIZE", "10000"))
+
+
+class StateBackend:
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, namespace: str, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    async def set_if_absent(self, namespace: str, key: str, value: Any) -> bool:
+        """Store ``value`` unless ``key`` exists; True if it was stored."""
+        raise NotImplementedError
+
+    async def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    async def append(self, namespace: str, key: str, item: Any) -> None:
+        raise NotImplementedError
+
+    async def get_list(self, namespace: str, key: str) -> List[Any]:
+        raise NotImplementedError
+
+    async def incr(self, namespace: str, key: str) -> int:
+        """Atomically add one to a counter (starting at 0) and return the new value."""
+        raise NotImplementedError
+
+    async def counter(self, namespace: str, key: str) -> int:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    def __init__(self):
+        self._values: Dict[str, Dict[str, Any]] = {}
+        self._lists: Dict[str, Dict[str, List[Any]]] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+
+    async def get(self, namespace, key):
+        return self._values.get(namespace, {}).get(key)
+
+    async def set(self, namespace, key, value):
+        self._values.setdefault(namespace, {})[key] = value
+
+    async def set_if_absent(self, namespace, key, value):
+        values = self._values.setdefault(namespace, {})
+        if key in values:
+            return False
+        values[key] = value
+        return True
+
+    async def delete(self, namespace, key):
+        self._values.get(namespace, {}).pop(key, None)
+        self._lists.get(namespace, {}).pop(key, None)
+
+    async def append(self, namespace, key, item):
+        self._lists.setdefault(namespace, {}).setdefault(key, []).append(item)
+
+    async def get_list(self, namespace, key):
+        return list(self._lists.get(namespace, {}).get(key, []))
+
+    async def incr(self, namespace, key):
+        self._counters[namespace, key] = self._counters.get((namespace, key), 0) + 1
+        return self._counters[namespace, key]
+
+    async def counter(self, namespace, key):
+        return self._counters.get((namespace, key), 0)
+
+
+class RedisStateBackend(StateBackend):
+    """Values in one hash per namespace; lists in one Redis list per key."""
+
+    def __init__(self, url: str = STATE_REDIS_URL, prefix: str = "state"):
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def _hash(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}"
+
+    def _list(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:list:{key}"
+
+    def _counters(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}:counters"
+
+    async def get(self, namespace, key):
+        raw = await self.client.hget(self._hash(namespace), key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, namespace, key, value):
+        await self.client.hset(self._hash(namespace), key, json.dumps(value))
+
+    async def set_if_absent(self, namespace, key, value):
+        return bool(await self.client.hsetnx(self._hash(namespace), key, json.dumps(value)))
+
+    async def delete(self, namespace, key):
+        await self.client.hdel(self._hash(namespace), key)
+        await self.client.delete(self._list(namespace, key))
+
+    async def append(self, namespace, key, item):
+        await self.client.rpush(self._list(namespace, key), json.dumps(item))
+
+    async def get_list(self, namespace, key):
+        return [json.loads(raw) for raw in await self.client.lrange(self._list(namespace, key), 0, -1)]
+
+    async def incr(self, namespace, key):
+        return await self.client.hincrby(self._counters(namespace), key, 1)
+
+    async def counter(self, namespace, key):
+        return int(await self.client.hget(self._counters(namespace), key) or 0)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class CachedStateBackend(StateBackend):
+    """Read-through LRU with TTL in front of a shared backend.
+
+    Writes made by this process update the cache immediately; writes made
+    by other processes become visible here after at most ``ttl`` seconds.
+    Missing keys are not cached, so a value created elsewhere (a new user,
+    a freshly linked token) is seen on the next read.
+
+    Only single values are cached. Lists and counters always come from the
+    backend, because clients pair a list with the counter that versions it,
+    and a stale list under a fresh version would never be refreshed.
+    """
+
+    def __init__(self, backend: StateBackend, ttl: float = STATE_CACHE_TTL, max_entries: int = STATE_CACHE_SIZE):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def _store(self, key: tuple, value: Any) -> None:
+        if value is None:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, namespace, key):
+        cache_key = (namespace, key)
+        value = self._lookup(cache_key)
+        if value is None:
+            self.misses += 1
+            value = await self.backend.get(namespace, key)
+            self._store(cache_key, value)
+        return value
+
+    async def set(self, namespace, key, value):
+        await self.backend.set(namespace, key, value)
+        self._store((namespace, key), value)
+
+    async def set_if_absent(self, namespace, key, value):
+        stored = await self.backend.set_if_absent(namespace, key, value)
+        if stored:
+            self._store((namespace, key), value)
+        return stored
+
+    async def delete(self, namespace, key):
+        await self.backend.delete(namespace, key)
+        self._entries.pop((namespace, key), None)
+
+    async def append(self, namespace, key, item):
+        await self.backend.append(namespace, key, item)
+
+    async def get_list(self, namespace, key):
+        return await self.backend.get_list(namespace, key)
+
+    async def incr(self, namespace, key):
+        return await self.backend.incr(namespace, key)
+
+    async def counter(self, namespace, key):
+        return await self.backend.counter(namespace, key)
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+def create_backend(kind: str = STATE_BACKEND) -> StateBackend:
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "redis":
+        backend = RedisStateBackend()
+        return CachedStateBackend(backend) if STATE_CACHE_TTL > 0 else backend
+    raise ValueError(f"Unknown STATE_BACKEND {kind!r}; expected 'memory' or 'redis'")
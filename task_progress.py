@@ -0,0 +1,154 @@
+"""Task progress events published by the worker through Redis.
+
+Each event is stored as the task's latest progress (so polling is a single
+GET) and published on a per-task channel for clients that stream updates.
+Events look like ``{"stage": "compositing", "percent": 42.0, "ts": ...}``;
+the last one carries ``"final": true`` together with the task outcome.
+
+Stages of a video render: ``started``, ``fetching_assets``, ``tts``,
+``compositing``, ``encoding``, ``uploading``, then ``done`` or ``failed``.
+"""
+
+import os
+import json
+import time
+import logging
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+TASK_PROGRESS_URL = os.getenv("TASK_PROGRESS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+# how long the latest event of a task stays readable
+TASK_PROGRESS_TTL = int(os.getenv("TASK_PROGRESS_TTL", "86400"))
+# percent-only updates of the same stage closer together than this are dropped
+TASK_PROGRESS_MIN_INTERVAL = float(os.getenv("TASK_PROGRESS_MIN_INTERVAL", "0.5"))
+
+_current: ContextVar[Optional[dict]] = ContextVar("task_progress", default=None)
+_client: Optional[redis.Redis] = None
+_async_client: Optional[aioredis.Redis] = None
+
+
+def latest_key(task_id: str) -> str:
+    return f"task:progress:{task_id}"
+
+
+def channel(task_id: str) -> str:
+    return f"task:events:{task_id}"
+
+
+def get_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(TASK_PROGRESS_URL, decode_responses=True)
+    return _client
+
+
+def get_async_client() -> aioredis.Redis:
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(TASK_PROGRESS_URL, decode_responses=True)
+    return _async_client
+
+
+def _publish(task_id: str, event: dict) -> None:
+    payload = json.dumps(event, default=str)
+    try:
+        pipe = get_client().pipeline()
+        pipe.set(latest_key(task_id), payload, ex=TASK_PROGRESS_TTL)
+        pipe.publish(channel(task_id), payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"[progress] Could not publish event for {task_id}: {e}")
+
+
+# --- worker side -----------------------------------------------------------
+
+def start(task_id: str) -> None:
+    """Route ``report`` calls in this context (and threads/tasks it spawns) to ``task_id``."""
+    _current.set({"task_id": task_id, "stage": None, "percent": None, "sent": 0.0})
+    report("started")
+
+
+def report(stage: str, percent: Optional[float] = None, **detail) -> None:
+    """Publish a progress event for the current task; a no-op outside a task."""
+    state = _current.get()
+    if state is None:
+        return
+    now = time.monotonic()
+    if stage == state["stage"]:
+        if percent is None or percent == state["percent"]:
+            return
+        if percent < 100 and now - state["sent"] < TASK_PROGRESS_MIN_INTERVAL:
+            return
+    state.update(stage=stage, percent=percent, sent=now)
+    event = {"stage": stage, "ts": time.time(), **detail}
+    if percent is not None:
+        event["percent"] = round(percent, 1)
+    _publish(state["task_id"], event)
+
+
+def counter(stage: str, total: int):
+    """Return a callable that reports ``stage`` percent each time one of ``total`` items finishes."""
+    done = 0
+
+    def step() -> None:
+        nonlocal done
+        done += 1
+        report(stage, 100 * done / total)
+
+    return step
+
+
+def finish(task_id: str, succeeded: bool, result=None) -> None:
+    """Publish the final event; ``result`` is the return value or the exception."""
+    event = {"stage": "done" if succeeded else "failed", "ts": time.time(), "final": True}
+    if succeeded:
+        event.update(status="success", result=result)
+    else:
+        event.update(status="failure", detail=str(result))
+    _publish(task_id, event)
+    _current.set(None)
+
+
+# --- API side --------------------------------------------------------------
+
+async def latest(task_id: str) -> Optional[dict]:
+    try:
+        raw = await get_async_client().get(latest_key(task_id))
+    except redis.RedisError as e:
+        logger.warning(f"[progress] Could not read progress of {task_id}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def events(task_id: str, idle_timeout: float = 15.0) -> AsyncIterator[Optional[dict]]:
+    """Yield the latest event, then every new one until the final event.
+
+    Yields ``None`` after ``idle_timeout`` seconds without events so the
+    caller can send a keep-alive or check whether the task died silently.
+    """
+    pubsub = get_async_client().pubsub()
+    # subscribe before reading the latest event so nothing falls in between
+    await pubsub.subscribe(channel(task_id))
+    try:
+        current = await latest(task_id)
+        if current:
+            yield current
+            if current.get("final"):
+                return
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=idle_timeout)
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message["data"])
+            yield event
+            if event.get("final"):
+                return
+    finally:
+        await pubsub.unsubscribe(channel(task_id))
+        await pubsub.aclose()
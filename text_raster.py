@@ -0,0 +1,123 @@
+"""In-process text rasterization with a bounded LRU cache.
+
+Replaces ImageMagick-backed ``TextClip`` for the render engines: text is
+drawn with Pillow into an RGBA array, wrapped to the frame width, and the
+result is reused across renders in the same worker process.
+"""
+
+import os
+import math
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+TEXT_FONT_PATH = os.getenv("TEXT_FONT_PATH")
+TEXT_RASTER_CACHE_BYTES = int(os.getenv("TEXT_RASTER_CACHE_BYTES", str(64 * 1024 ** 2)))
+# Horizontal margin, as a fraction of the canvas width, kept free when wrapping
+TEXT_WRAP_MARGIN = 0.05
+
+
+def _load_font(font: Optional[str], fontsize: int):
+    path = font or TEXT_FONT_PATH
+    for candidate in filter(None, [path, "DejaVuSans.ttf"]):
+        try:
+            return ImageFont.truetype(candidate, fontsize)
+        except OSError:
+            continue
+    logger.warning("No TrueType font found, using Pillow's default font.")
+    return ImageFont.load_default(size=fontsize)
+
+
+def wrap_text(text: str, font, max_width: Optional[int]) -> List[str]:
+    """Greedily wrap ``text`` so that no line is wider than ``max_width`` pixels."""
+    if not max_width:
+        return text.splitlines() or [""]
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and font.getlength(candidate) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def rasterize(
+    text: str,
+    fontsize: int = 48,
+    color: str = "white",
+    font: Optional[str] = None,
+    wrap_width: Optional[int] = None,
+) -> np.ndarray:
+    """Draw ``text`` centered on a tight transparent canvas; returns HxWx4 uint8."""
+    pil_font = _load_font(font, fontsize)
+    wrapped = "\n".join(wrap_text(text, pil_font, wrap_width))
+    probe = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    box = probe.multiline_textbbox((0, 0), wrapped, font=pil_font, align="center")
+    # centered multiline boxes come back with fractional edges
+    left, top = math.floor(box[0]), math.floor(box[1])
+    right, bottom = math.ceil(box[2]), math.ceil(box[3])
+    img = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).multiline_text((-left, -top), wrapped, font=pil_font, fill=color, align="center")
+    return np.asarray(img)
+
+
+class TextRasterCache:
+    """LRU of rasterized text bounded by total array bytes."""
+
+    def __init__(self, max_bytes: int = TEXT_RASTER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        text: str,
+        fontsize: int = 48,
+        color: str = "white",
+        font: Optional[str] = None,
+        canvas_size: Optional[Tuple[int, int]] = None,
+    ) -> np.ndarray:
+        wrap_width = int(canvas_size[0] * (1 - 2 * TEXT_WRAP_MARGIN)) if canvas_size else None
+        key = (text, font or TEXT_FONT_PATH, fontsize, color, wrap_width, canvas_size)
+        with self._lock:
+            arr = self._entries.get(key)
+            if arr is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return arr
+        arr = rasterize(text, fontsize, color, font, wrap_width)
+        arr.setflags(write=False)
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries:
+                self._entries[key] = arr
+                self.size += arr.nbytes
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, old = self._entries.popitem(last=False)
+                self.size -= old.nbytes
+        return arr
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self.size}
+
+
+text_cache = TextRasterCache()
+
+
+def render_text(text: str, fontsize: int = 48, color: str = "white", canvas_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """Cached RGBA raster of ``text``, wrapped to ``canvas_size`` when given."""
+    return text_cache.get(text, fontsize=fontsize, color=color, canvas_size=canvas_size)
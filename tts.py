@@ -0,0 +1,134 @@
+"""Pluggable text-to-speech backends and a persistent narration cache."""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from typing import Dict, Optional, Tuple, Type
+
+from asset_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "clipopera_tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 ** 2)))
+
+
+class TTSBackend:
+    """Base class for engines that turn text into an audio file."""
+
+    name = "base"
+    suffix = ".mp3"
+
+    def __init__(self, voice: Optional[str] = None):
+        self.voice = voice
+
+    def synthesize(self, text: str, lang: str, path: str) -> None:
+        raise NotImplementedError
+
+    def cache_id(self) -> str:
+        """Identify the engine and voice for cache keys."""
+        return f"{self.name}:{self.voice or ''}"
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS (network). ``voice`` selects the accent TLD."""
+
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str, path: str) -> None:
+        from gtts import gTTS
+
+        gTTS(text, lang=lang, tld=self.voice or "com").save(path)
+
+
+class Pyttsx3Backend(TTSBackend):
+    """Offline synthesis through the local speech engine (requires ``pyttsx3``)."""
+
+    name = "pyttsx3"
+    suffix = ".wav"
+
+    def synthesize(self, text: str, lang: str, path: str) -> None:
+        import pyttsx3
+
+        engine = pyttsx3.init()
+        if self.voice:
+            engine.setProperty("voice", self.voice)
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+
+
+TTS_BACKENDS: Dict[str, Type[TTSBackend]] = {
+    GTTSBackend.name: GTTSBackend,
+    Pyttsx3Backend.name: Pyttsx3Backend,
+}
+
+
+def register_backend(backend_cls: Type[TTSBackend]) -> None:
+    TTS_BACKENDS[backend_cls.name] = backend_cls
+
+
+def get_backend(name: Optional[str] = None, voice: Optional[str] = None) -> TTSBackend:
+    name = name or TTS_BACKEND
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    return TTS_BACKENDS[name](voice=voice or os.getenv("TTS_VOICE"))
+
+
+def measure_duration(path: str) -> float:
+    from moviepy.editor import AudioFileClip
+
+    clip = AudioFileClip(path)
+    try:
+        return clip.duration
+    finally:
+        clip.close()
+
+
+class TTSCache(DiskCache):
+    """Encoded narration and its duration keyed by (text, language, engine/voice)."""
+
+    def __init__(self, root: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        super().__init__(root, max_bytes)
+        self.index_dir = os.path.join(root, "index")
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    def _key(self, text: str, lang: str, backend: TTSBackend) -> str:
+        raw = json.dumps([text, lang, backend.cache_id()])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def synthesize(self, text: str, lang: str = "en", backend: Optional[TTSBackend] = None) -> Tuple[str, float]:
+        """Return ``(path, duration)`` for the narration, synthesizing on a miss."""
+        backend = backend or get_backend()
+        index_path = os.path.join(self.index_dir, self._key(text, lang, backend) + ".json")
+        try:
+            with open(index_path) as fh:
+                entry = json.load(fh)
+            path = self.blob_path(entry["digest"], entry["suffix"])
+            if os.path.exists(path):
+                self.hits += 1
+                self.touch(path)
+                return path, entry["duration"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        self.misses += 1
+        fd, tmp = tempfile.mkstemp(suffix=backend.suffix)
+        os.close(fd)
+        try:
+            backend.synthesize(text, lang, tmp)
+            duration = measure_duration(tmp)
+            with open(tmp, "rb") as fh:
+                digest = self.put_bytes(fh.read(), backend.suffix)
+        finally:
+            os.unlink(tmp)
+        self._atomic_write(index_path, json.dumps({
+            "digest": digest,
+            "suffix": backend.suffix,
+            "duration": duration,
+            "backend": backend.cache_id(),
+        }).encode())
+        logger.info(f"[TTS] Synthesized {len(text)} chars with {backend.cache_id()} ({duration:.2f}s)")
+        return self.blob_path(digest, backend.suffix), duration